@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for the ingestion, retrieval and post-processing hot paths.
+
+  python scripts/bench.py [--sizes 5,40,160] [--repeat 5] [--out FILE] [--baseline FILE]
+
+Runs from the repo root with no network: PDFs, corpora and Markdown are synthetic
+(seeded), embeddings come from the hashing function the tests use
+(tests/helpers.py), and every store or cache lives in a temp dir.
+Results (median/min/mean ms per case) are written as JSON. With --baseline, cases
+whose median got slower by more than --threshold are flagged and the exit status is 1.
+"""
+import argparse
+import atexit
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+TMP = Path(tempfile.mkdtemp(prefix="bench-"))
+atexit.register(shutil.rmtree, TMP, ignore_errors=True)
+
+# Keep every store/cache out of src/data and off the network before src.* is imported.
+os.environ.update({
+    "VECTORSTORE_DIR": str(TMP / "vectorstore"),
+    "PDF_CACHE_DIR": str(TMP / "pdf-text"),
+    "EMBED_CACHE": "0",
+    "RAG_QUERY_CACHE_PATH": "",
+    "TOKEN_ENCODING": os.getenv("TOKEN_ENCODING", "cl100k_base"),
+})
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from helpers import HashEmbeddingFunction, write_pdf  # the suite's stand-ins: same embedder as the tests
+
+WORDS = ("protein gene expression cell tumor mutation pathway receptor signal kinase sample cohort "
+         "patients trial dose response assay sequencing variant allele binding inhibitor model mouse "
+         "tissue control significant increase decrease observed measured analysis results methods "
+         "the of and in to with was were for by on that from this these we our study data").split()
+TERMS = ("BRCA1 TP53 EGFR KRAS CRISPR RNA-seq p53 HER2 PD-L1 IL-6 mTOR CD8").split()
+
+# ---------------- synthetic inputs ----------------
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(TERMS) if rng.random() < 0.08 else rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    s = " ".join(words)
+    return s[:1].upper() + s[1:] + "."  # not capitalize(): that would lowercase the acronyms in TERMS
+
+def make_pdf(path: Path, pages: int, seed: int = 0, lines_per_page: int = 45) -> Path:
+    """Text-only PDF of seeded sentences that pypdf can extract."""
+    rng = random.Random(seed)
+    return write_pdf(path, [[_sentence(rng) for _ in range(lines_per_page)] for _ in range(pages)])
+
+def make_markdown(sections: int, seed: int = 0) -> str:
+    """A post with the usual LLM damage: outer fence, fenced FAQ, trailing spaces, blank runs."""
+    rng = random.Random(seed)
+    parts = ["```markdown", "# " + _sentence(rng)[:60], ""]
+    for i in range(sections):
+        parts += [f"## Section {i + 1}", "", " ".join(_sentence(rng) for _ in range(6)) + "   ", "", "", ""]
+        if i % 4 == 3:
+            parts += ["```python", "x = 1", "```", ""]
+    parts += ["## FAQs", "```", "**Q:** " + _sentence(rng), "**A:** " + _sentence(rng), "```", "```"]
+    return "\n".join(parts) + "\n"
+
+def make_seo_json(seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "```json\n" + json.dumps({
+        "title": _sentence(rng)[:60], "slug": "bench-post", "meta_description": _sentence(rng),
+        "tags": rng.sample(TERMS, 4),
+    }) + "\n```"
+
+# ---------------- harness ----------------
+results = {}
+
+def bench(name: str, fn, repeat: int, setup=None, **meta) -> None:
+    """Time fn() (or fn(setup(i)) when setup is given) `repeat` times; setup isn't timed."""
+    times = []
+    for i in range(repeat):
+        arg = setup(i) if setup else None
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(arg) if setup else fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    results[name] = {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3),
+                     "mean_ms": round(statistics.fmean(times), 3), "repeat": repeat, **meta}
+    print(f"  {name:<40} {results[name]['median_ms']:>10.2f} ms", flush=True)
+
+def skip(name: str, err: BaseException) -> None:
+    results[name] = {"skipped": f"{type(err).__name__}: {err}"}
+    print(f"  {name:<40} skipped ({type(err).__name__}: {err})", flush=True)
+
+def _load_script(name: str):
+    spec = importlib.util.spec_from_file_location(name, ROOT / "scripts" / f"{name}.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def queries(seed: int):
+    rng = random.Random(seed)
+    while True:  # unique queries, so the query cache never answers for us
+        yield f"{rng.choice(TERMS)} {rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randint(0, 10**6)}"
+
+# ---------------- suites ----------------
+def bench_ingest_and_search(sizes, repeat):
+    from src.tools.pdf_tools import load_pdf_text
+    from src.tools import rag_tools
+    from src.tools.run_context import RunContext, use_context
+
+    rag_tools.set_embedding_function(HashEmbeddingFunction())
+    persist = os.environ["VECTORSTORE_DIR"]
+    try:
+        from src.agentic import tools as agentic_tools
+        agentic_search = getattr(agentic_tools.pdf_rag_search, "func", agentic_tools.pdf_rag_search)
+    except Exception as e:  # crewai_tools missing
+        agentic_search, agentic_err = None, e
+
+    for pages in sizes:
+        pdf = make_pdf(TMP / f"synthetic-{pages}p.pdf", pages, seed=pages)
+        text = load_pdf_text(str(pdf), parallel=False)
+        txt = TMP / f"synthetic-{pages}p.txt"
+        txt.write_text(text, encoding="utf-8")
+        meta = {"pages": pages, "chars": len(text)}
+
+        bench(f"load_pdf_text/serial/{pages}p", lambda: load_pdf_text(str(pdf), parallel=False), repeat, **meta)
+        bench(f"load_pdf_text/parallel/{pages}p", lambda: load_pdf_text(str(pdf), parallel=True), repeat, **meta)
+
+        bench(f"build_store/cold/{pages}p",
+              lambda name: rag_tools.build_store(text, collection_name=name, persist_dir=persist),
+              repeat, setup=lambda i: f"bench-{pages}p-cold-{i}", **meta)
+        coll = f"bench-{pages}p"
+        rag_tools.build_store(text, collection_name=coll, persist_dir=persist)
+        bench(f"build_store/warm/{pages}p",
+              lambda: rag_tools.build_store(text, collection_name=coll, persist_dir=persist), repeat, **meta)
+
+        q = queries(pages)
+        bench(f"retrieve/{pages}p", lambda s: rag_tools.retrieve(s, k=5, collection_name=coll, persist_dir=persist),
+              repeat, setup=lambda i: next(q), **meta)
+        ctx = RunContext(collection=coll, persist_dir=persist, top_k=5, text_cache=str(txt))
+        bench(f"pdf_rag_search/tools/{pages}p", lambda s: rag_tools._pdf_rag_search(s, ctx),
+              repeat, setup=lambda i: next(q), **meta)
+        bench(f"pdf_rag_multi_search/tools/{pages}p",
+              lambda s: rag_tools._pdf_rag_multi_search([s, s + " results", s + " methods"], ctx),
+              repeat, setup=lambda i: next(q), **meta)
+
+        name = f"pdf_rag_search/agentic/{pages}p"
+        if agentic_search is None:
+            skip(name, agentic_err)
+            continue
+        with use_context(ctx):
+            agentic_search("warm-up")  # builds the per-file passage index once
+            bench(name, agentic_search, repeat, setup=lambda i: next(q), **meta)
+
+def bench_post_processing(sizes, repeat):
+    from src.utils.assemble import main as assemble_main
+    clean_markdown = _load_script("clean_markdown")
+    qa_fix_markdown = _load_script("qa_fix_markdown")
+
+    for n in sizes:
+        md = make_markdown(n, seed=n)
+        post, seo, out = TMP / f"post-{n}.md", TMP / f"seo-{n}.json", TMP / f"final-{n}.md"
+        post.write_text(md, encoding="utf-8")
+        seo.write_text(make_seo_json(n), encoding="utf-8")
+        meta = {"sections": n, "chars": len(md)}
+
+        bench(f"assemble.main/{n}s", lambda: assemble_main(str(post), str(seo), str(out)), repeat, **meta)
+        fm_doc = "---\ntitle: Bench\nslug: bench\n---\n" + md
+        bench(f"clean_markdown.clean_text/{n}s", lambda: clean_markdown.clean_text(fm_doc), repeat, **meta)
+        target = TMP / f"qa-{n}.md"
+        bench(f"qa_fix_markdown.fix_file/{n}s", lambda p: qa_fix_markdown.fix_file(p), repeat,
+              setup=lambda i: (target.write_text(fm_doc, encoding="utf-8"), target)[1], **meta)
+
+# ---------------- compare ----------------
+def compare(baseline_path: str, threshold: float, min_delta_ms: float) -> int:
+    base = json.loads(Path(baseline_path).read_text(encoding="utf-8")).get("results", {})
+    regressions = 0
+    print(f"\n{'case':<40} {'median ms':>10} {'baseline':>10} {'change':>8}")
+    for name, cur in results.items():
+        old = base.get(name) or {}
+        if "median_ms" not in cur or "median_ms" not in old:
+            continue
+        change = cur["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+        slow = change > threshold and cur["median_ms"] - old["median_ms"] > min_delta_ms
+        regressions += slow
+        cur["baseline_ms"], cur["regression"] = old["median_ms"], slow
+        print(f"{name:<40} {cur['median_ms']:>10.2f} {old['median_ms']:>10.2f} {change:>+7.0%}{' ❌' if slow else ''}")
+    return regressions
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="5,40,160", help="Synthetic PDF sizes in pages (also Markdown sections)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", choices=("ingest", "post"), help="Run one suite")
+    ap.add_argument("--out", help="Results JSON (default: src/data/bench/bench-<commit>.json)")
+    ap.add_argument("--baseline", help="Earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Flag medians slower by more than this fraction")
+    ap.add_argument("--min-delta-ms", type=float, default=0.5, help="...and by at least this many ms")
+    args = ap.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    commit = _commit()
+    print(f"⏱️  Benchmarks @ {commit} (sizes {sizes}, repeat {args.repeat}, tmp {TMP})")
+    if args.only in (None, "ingest"):
+        bench_ingest_and_search(sizes, args.repeat)
+    if args.only in (None, "post"):
+        bench_post_processing(sizes, args.repeat)
+
+    regressions = compare(args.baseline, args.threshold, args.min_delta_ms) if args.baseline else 0
+    out = Path(args.out or ROOT / "src" / "data" / "bench" / f"bench-{commit}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "meta": {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                 "sizes": sizes, "repeat": args.repeat, "baseline": args.baseline},
+        "results": results,
+    }, indent=2), encoding="utf-8")
+    print(f"📊 Results: {out}" + (f" — {regressions} regression(s)" if regressions else ""))
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Import-time budget for the light entry points (run from the repo root).
+
+  python scripts/import_budget.py [--budget-ms 300] [--repeat 3]
+
+tests/test_import_budget.py runs the same check under pytest.
+
+Each entry point runs under `python -X importtime`. It fails when a heavy dependency
+(crewai, chromadb, ...) gets imported at all, or when its imports (minus bare
+interpreter start-up) take longer than the budget. The timing uses the best of
+--repeat runs to damp noise.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+HEAVY = ("crewai", "crewai_tools", "chromadb", "litellm", "openai", "onnxruntime",
+         "pypdf", "numpy", "tiktoken")
+
+ENTRY_POINTS = [
+    ("src.main --help", ["-m", "src.main", "--help"]),
+    ("src.worker --help", ["-m", "src.worker", "--help"]),
+    ("import src.utils.assemble", ["-c", "import src.utils.assemble"]),
+]
+
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "300"))
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def importtime(args):
+    """(total top-level cumulative µs, set of imported module names) for one run."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ {' '.join(args)} exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+    total, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        modules.add(m.group(4))
+        if not m.group(3):  # top-level entry: its cumulative time covers its children
+            total += int(m.group(2))
+    return total, modules
+
+def best(args, repeat):
+    runs = [importtime(args) for _ in range(repeat)]
+    return min(t for t, _ in runs), runs[0][1]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    baseline, _ = best(["-c", "pass"], args.repeat)
+    failed = False
+    for name, argv in ENTRY_POINTS:
+        total, modules = best(argv, args.repeat)
+        ms = max(0, total - baseline) / 1000
+        heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY)
+        ok = ms <= args.budget_ms and not heavy
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name:<28} {ms:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+        if heavy:
+            print(f"   heavy imports: {', '.join(sorted({m.split('.')[0] for m in heavy}))}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from crewai import Agent
 import os
 
+from src.llm.llms import build_llm
+
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
 def strategist():
@@ -10,7 +12,7 @@ def strategist():
               "search intent, headings, and entity coverage."),
         backstory=("You’re an expert in SEO content strategy and topical authority."),
         allow_delegation=False,
-        model=OPENAI_MODEL,
+        llm=build_llm(OPENAI_MODEL),
         verbose=False,
     )
 
@@ -23,7 +25,7 @@ def researcher(rag_tool, web_tool=None):
         backstory=("You love rigor, citations, and avoiding speculation."),
         tools=tools,
         allow_delegation=False,
-        model=OPENAI_MODEL,
+        llm=build_llm(OPENAI_MODEL),
         verbose=False,
     )
 
@@ -34,7 +36,7 @@ def writer():
               "that targets the defined search intent."),
         backstory=("You write for humans first, search engines second."),
         allow_delegation=False,
-        model=OPENAI_MODEL,
+        llm=build_llm(OPENAI_MODEL),
         verbose=False,
     )
 
@@ -47,7 +49,7 @@ def fact_checker(rag_tool, web_tool=None):
         backstory=("Skeptical by nature; you verify everything."),
         tools=tools,
         allow_delegation=False,
-        model=OPENAI_MODEL,
+        llm=build_llm(OPENAI_MODEL),
         verbose=False,
     )
 
@@ -58,7 +60,7 @@ def seo_finisher():
               "then finalize deliverables."),
         backstory=("You ensure search readiness & structured data correctness."),
         allow_delegation=False,
-        model=OPENAI_MODEL,
+        llm=build_llm(OPENAI_MODEL),
         verbose=False,
     )
 
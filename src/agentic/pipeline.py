@@ -1,9 +1,12 @@
 import os, json, re
 from datetime import datetime
+from pathlib import Path
 from crewai import Crew, Process
 from .agents import strategist, researcher, writer, fact_checker, seo_finisher
 from .tools import pdf_rag_search, json_validate, yaml_validate
 from .tasks import plan_task, research_task, writing_task, factcheck_task, seo_task
+from src.tools.run_context import current, use_context
+from src.utils.checkpoint import atomic_write
 
 OUTDIR = "src/data/output"
 
@@ -13,15 +16,28 @@ def _safe_slug(s: str) -> str:
     return s.strip("-")
 
 def save(path, text):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
+    atomic_write(Path(path), text)  # temp file + rename: readers never see half an artifact
     return path
 
+def _raw(out) -> str:
+    return out.raw if hasattr(out, "raw") else str(out)
+
+def _checked_plan(plan_yaml: str) -> str:
+    if "error:" in yaml_validate(plan_yaml):
+        return f"# YAML validation failed; raw output kept\n{plan_yaml}"
+    return plan_yaml
+
+def _checked_facts(facts_json: str) -> str:
+    if "error:" in json_validate(facts_json):
+        return json.dumps({"error": "invalid json from fact checker", "raw": facts_json}, indent=2)
+    return facts_json
+
 def run_agentic(topic: str, pdf_txt_path: str):
-    # expose PDF cache for the tool
-    os.environ["PDF_TXT_CACHE"] = pdf_txt_path
+    # expose PDF cache for the tool (scoped to this run, not the whole process)
+    with use_context(current().with_(text_cache=pdf_txt_path)):
+        return _run_agentic(topic)
 
+def _run_agentic(topic: str):
     strat = strategist()
     res = researcher(pdf_rag_search)
     wr = writer()
@@ -31,14 +47,39 @@ def run_agentic(topic: str, pdf_txt_path: str):
     slug = _safe_slug(topic)
     date = datetime.utcnow().date().isoformat()
 
+    base = os.path.join(OUTDIR, slug)
+    # Each artifact is written as soon as its task finishes, so a crash in a later task
+    # keeps the earlier ones and they can be inspected while the crew is still running.
+    files = {
+        "plan": (f"{base}-plan.yaml", _checked_plan),
+        "research": (f"{base}-research.md", str),
+        "post": (f"{base}-post.md", str),
+        "facts": (f"{base}-facts.json", _checked_facts),
+        "seo": (f"{base}-seo-notes.md", str),
+    }
+    paths = {}
+
+    def saver(name):
+        path, check = files[name]
+        def on_done(output):
+            paths[name] = save(path, check(_raw(output)))
+        return on_done
+
+    # Optional: extract image prompt ideas from the research/posts
+    image_prompts = (
+        "Generate 3 image prompts that would help illustrate the post. "
+        "Style: photorealistic or schematic as appropriate. Include subject, setting, lighting, and angle."
+    )
+    image_prompts_path = save(f"{base}-image-prompts.md", image_prompts)
+
     crew = Crew(
         agents=[strat, res, wr, fc, fin],
         tasks=[
-            plan_task(strat, topic),
-            research_task(res, topic),
-            writing_task(wr, topic, slug),
-            factcheck_task(fc),
-            seo_task(fin),
+            plan_task(strat, topic, callback=saver("plan")),
+            research_task(res, topic, callback=saver("research")),
+            writing_task(wr, topic, slug, callback=saver("post")),
+            factcheck_task(fc, callback=saver("facts")),
+            seo_task(fin, callback=saver("seo")),
         ],
         process=Process.sequential,
         verbose=False,
@@ -46,33 +87,8 @@ def run_agentic(topic: str, pdf_txt_path: str):
 
     results = crew.kickoff()
 
-    # Pull artifacts from each task’s output text (CrewAI returns a list)
-    plan_yaml = results[0].raw if hasattr(results[0], "raw") else str(results[0])
-    research_md = results[1].raw if hasattr(results[1], "raw") else str(results[1])
-    post_md = results[2].raw if hasattr(results[2], "raw") else str(results[2])
-    facts_json = results[3].raw if hasattr(results[3], "raw") else str(results[3])
-    seo_notes = results[4].raw if hasattr(results[4], "raw") else str(results[4])
-
-    # Validate JSON/YAML lightly
-    if "error:" in yaml_validate(plan_yaml):
-        plan_yaml = f"# YAML validation failed; raw output kept\n{plan_yaml}"
-    if "error:" in json_validate(facts_json):
-        facts_json = json.dumps({"error": "invalid json from fact checker", "raw": facts_json}, indent=2)
-
-    # Optional: extract image prompt ideas from the research/posts
-    image_prompts = (
-        "Generate 3 image prompts that would help illustrate the post. "
-        "Style: photorealistic or schematic as appropriate. Include subject, setting, lighting, and angle."
-    )
-
-    base = os.path.join(OUTDIR, slug)
-    paths = {
-        "plan": save(f"{base}-plan.yaml", plan_yaml),
-        "research": save(f"{base}-research.md", research_md),
-        "post": save(f"{base}-post.md", post_md),
-        "facts": save(f"{base}-facts.json", facts_json if isinstance(facts_json, str) else json.dumps(facts_json, indent=2)),
-        "seo": save(f"{base}-seo-notes.md", seo_notes),
-        "image_prompts": save(f"{base}-image-prompts.md", image_prompts),
-    }
-    return paths
-
+    # Callbacks normally saved everything; fall back to the returned outputs for any they missed
+    for i, name in enumerate(files):
+        if name not in paths:
+            saver(name)(results.tasks_output[i])
+    return {**{name: paths[name] for name in files}, "image_prompts": image_prompts_path}
@@ -1,30 +1,25 @@
-from typing import List, Dict, Any
 from crewai_tools import tool
 import json, yaml, os
 
-# Minimal RAG over a prebuilt vectorstore (or simple text load if you prefer)
+from src.tools.passages import search_passages
+from src.tools.run_context import current
+from src.utils import trace
+
+MAX_HITS = 8
+
+# Minimal RAG over the cached txt dump: BM25 over page-tagged passages (src/tools/passages.py)
 @tool("pdf_rag_search")
 def pdf_rag_search(query: str) -> str:
     """
     Search the loaded PDF chunks for relevant passages.
-    Returns a JSON string with 'snippets': [{text, source, page}].
+    Returns a JSON string with 'snippets': [{text, source, page, score}], best first.
     """
-    # If you already have a vectorstore in src/data/vectorstore, load it.
-    # Otherwise, fall back to a naive text scan over a cached txt dump.
-    # Keep it simple for now.
-    txt_path = os.getenv("PDF_TXT_CACHE", "src/data/input/current.txt")
+    txt_path = current().text_cache
     results = []
-    if os.path.exists(txt_path):
-        with open(txt_path, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
-        # naive scan
-        hits = []
-        for line in text.splitlines():
-            if len(line) > 80 and any(q.lower() in line.lower() for q in query.split()):
-                hits.append({"text": line.strip(), "source": "pdf", "page": None})
-            if len(hits) >= 8:
-                break
-        results = hits
+    with trace.span("pdf_rag_search"):
+        trace.add(tool_calls=1)
+        if txt_path and os.path.exists(txt_path):
+            results = search_passages(txt_path, query, MAX_HITS)
     return json.dumps({"snippets": results})
 
 @tool("json_validate")
@@ -2,15 +2,31 @@
 import os
 import re
 import json
+import time
+import asyncio
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional
 
 from crewai import Agent, Task, Crew, Process
 
-from src.tools.pdf_tools import load_pdf_text
-from src.tools.rag_tools import build_store, pdf_rag_search  # uses your Chroma + tool wrapper
+from src.llm.cache import cache_stats as llm_cache_stats, use_mode as use_llm_cache
+from src.llm.llms import attach_partial, build_llm, llm_identity
+from src.tools.compaction import CONTEXT_COMPACTION, compact_context, compact_text, parse_spec
+from src.tools.pdf_tools import cached_pdf_text, file_sha256
+from src.tools.tokens import count_tokens
+from src.utils.checkpoint import RunCheckpoint, atomic_write, fingerprint
+from src.utils import trace
+from src.utils.dag import arun_dag, run_dag, task_graph, topo_order
+from src.utils.partial import PartialWriter
+from src.tools.rag_tools import (  # uses your Chroma + tool wrapper
+    build_store, embedding_cache_stats, make_rag_tools, packing_stats, query_cache_stats,
+)
+from src.tools.run_context import RunContext, use_context
 
-__all__ = ["run_pipeline"]  # make import explicit: from src.crew import run_pipeline
+__all__ = ["run_pipeline", "run_pipeline_async", "stream_pipeline", "PipelineEvent", "trace_file"]  # make import explicit: from src.crew import run_pipeline
 
 # ---------------- helpers ----------------
 def _safe_slug(s: str) -> str:
@@ -37,53 +53,388 @@ def _extract_text(payload: Any) -> str:
             return str(payload)
     return str(payload)
 
-def _ensure_vectorstore(pdf_path: str, top_k: int) -> Tuple[str, str]:
-    """Build/refresh a Chroma collection for this PDF. Uses PDF_TXT_CACHE if set."""
-    persist_dir = os.environ.setdefault("VECTORSTORE_DIR", "src/data/vectorstore")
-    slug = _safe_slug(Path(pdf_path).stem)
-    collection_name = os.environ.setdefault("VECTORSTORE_COLLECTION", slug)
-    os.environ.setdefault("RAG_TOP_K", str(top_k))
+def _ensure_vectorstore(pdf_path: str, top_k: int, batch_size: Optional[int] = None,
+                        embed_workers: Optional[int] = None, verbose: bool = False,
+                        txt_cache: Optional[str] = None, collection: Optional[str] = None) -> RunContext:
+    """Build/refresh a Chroma collection for this PDF and return the run's tool context.
 
-    txt_path = os.getenv("PDF_TXT_CACHE")
-    if txt_path and Path(txt_path).exists():
+    Nothing is written to os.environ, so several pipelines can share one process.
+    """
+    persist_dir = os.getenv("VECTORSTORE_DIR", "src/data/vectorstore")
+    collection_name = collection or _safe_slug(Path(pdf_path).stem)
+
+    with trace.span("ensure_vectorstore", collection=collection_name):
+        txt_path = txt_cache
+        if not (txt_path and Path(txt_path).exists()):
+            with trace.span("pdf_text"):
+                txt_path = cached_pdf_text(pdf_path)
         text = Path(txt_path).read_text(encoding="utf-8", errors="ignore")
-    else:
-        text = load_pdf_text(pdf_path)
 
-    build_store(text, collection_name=collection_name, persist_dir=persist_dir)
-    return collection_name, persist_dir
+        build_store(text, collection_name=collection_name, persist_dir=persist_dir,
+                    batch_size=batch_size, workers=embed_workers, verbose=verbose)
+    return RunContext(collection=collection_name, persist_dir=persist_dir, top_k=top_k, text_cache=txt_path)
+
+TASK_CONCURRENCY = int(os.getenv("TASK_CONCURRENCY", "4"))
 
 # ---------------- tool registry ----------------
+# tool name -> factory(RunContext) returning {tool name: tool}; tools are built per run
 _TOOL_REGISTRY = {
-    "pdf_rag_search": pdf_rag_search,
+    "pdf_rag_search": make_rag_tools,
+    "pdf_rag_multi_search": make_rag_tools,
 }
 
+def _run_tools(ctx: RunContext) -> Dict[str, Any]:
+    made: Dict[Any, Dict[str, Any]] = {}
+    tools: Dict[str, Any] = {}
+    for name, factory in _TOOL_REGISTRY.items():
+        if factory not in made:
+            made[factory] = factory(ctx)
+        tools[name] = made[factory][name]
+    return tools
+
 # ---------------- builders ----------------
-def _build_agent(name: str, spec: Dict[str, Any]) -> Agent:
+def _agent_model(spec: Dict[str, Any]) -> str:
+    return spec.get("model", os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+
+def _build_agent(name: str, spec: Dict[str, Any], run_tools: Dict[str, Any]) -> Agent:
     role       = spec.get("role", name)
     goal       = spec.get("goal", "")
     backstory  = spec.get("backstory", "")
-    model      = spec.get("model", os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+    model      = _agent_model(spec)
     verbose    = bool(spec.get("verbose", False))
     tool_names = spec.get("tools", []) or []
-    tools = [_TOOL_REGISTRY[t] for t in tool_names if t in _TOOL_REGISTRY]
+    tools = [run_tools[t] for t in tool_names if t in run_tools]
 
     return Agent(
         role=role,
         goal=goal,
         backstory=backstory,
-        model=model,
+        llm=build_llm(model, spec),
         verbose=verbose,
         tools=tools or None,
         allow_delegation=False,
     )
 
-def _build_task(spec: Dict[str, Any], agent: Agent) -> Task:
-    return Task(
-        description=spec.get("description", ""),
+# task id -> compactor. Not a Task attribute: pydantic binds a callable stored on the
+# model like a method; entries go away with their task (weakref.finalize in _build_task).
+_compactors: Dict[str, Callable[[Optional[str]], Optional[str]]] = {}
+
+class _CompactingTask(Task):
+    """A Task that passes the context crewai assembles for it through its compactor first."""
+
+    def _compact(self, context: Optional[str]) -> Optional[str]:
+        compactor = _compactors.get(str(self.id))
+        return compactor(context) if compactor is not None else context
+
+    def execute_sync(self, agent=None, context=None, tools=None):
+        return super().execute_sync(agent=agent, context=self._compact(context), tools=tools)
+
+    def execute_async(self, agent=None, context=None, tools=None):
+        return super().execute_async(agent=agent, context=self._compact(context), tools=tools)
+
+def _build_task(spec: Dict[str, Any], agent: Agent, callback=None, prior: str = "",
+                context: Optional[List[Task]] = None,
+                compact: Optional[Callable[[Optional[str]], Optional[str]]] = None) -> Task:
+    description = spec.get("description", "")
+    if prior:
+        description = f"{description}\n\nResults of earlier tasks (from checkpoint):\n{prior}"
+    kwargs: Dict[str, Any] = {"context": context} if context is not None else {}
+    task = (Task if compact is None else _CompactingTask)(
+        description=description,
         expected_output=spec.get("expected_output", ""),
         agent=agent,
+        callback=callback,
+        **kwargs,
     )
+    if compact is not None:
+        _compactors[str(task.id)] = compact
+        weakref.finalize(task, _compactors.pop, str(task.id), None)
+    return task
+
+def trace_file(output_dir: str, pdf_path: str) -> Path:
+    """Where a run's span trace (JSON lines) is written: next to its artifacts."""
+    return Path(output_dir) / f"{_safe_slug(Path(pdf_path).stem)}-trace.jsonl"
+
+@contextmanager
+def _tracing(output_dir: str, pdf_path: str):
+    """Join the caller's tracer (e.g. src.main's) or own one and write it when the run ends."""
+    tracer = trace.active_tracer()
+    if tracer is not None:
+        yield tracer
+        return
+    tracer = trace.Tracer()
+    try:
+        with trace.use_tracer(tracer):
+            yield tracer
+    finally:
+        tracer.write(trace_file(output_dir, pdf_path))
+
+def _artifact_path(outdir: Path, slug: str, tid: str) -> Path:
+    return outdir / f"{slug}-{tid}{_ext_for_task_id(tid)}"
+
+def _write_artifact(outdir: Path, slug: str, tid: str, text: str) -> str:
+    path = _artifact_path(outdir, slug, tid)
+    atomic_write(path, text)
+    return str(path)
+
+# ---------------- run state ----------------
+@dataclass
+class PipelineEvent:
+    """Progress event from stream_pipeline: kind is "vectorstore", "task" or "complete"."""
+    kind: str
+    task_id: Optional[str] = None
+    path: Optional[str] = None
+    reused: bool = False
+    elapsed: float = 0.0
+    artifacts: Optional[Dict[str, str]] = None
+
+class _Run:
+    """Everything between "vector store ready" and "artifacts on disk" for one PDF.
+
+    Shared by the sync and async entry points: task planning, fingerprints/resume,
+    per-task persistence (artifact + checkpoint as each task completes) and the summary.
+    """
+
+    def __init__(self, pdf_path, agents_cfg, tasks_cfg, ctx: RunContext, output_dir, top_k, verbose,
+                 resume, on_event: Optional[Callable[[PipelineEvent], None]] = None):
+        self.agents_cfg, self.ctx, self.verbose = agents_cfg or {}, ctx, verbose
+        self.on_event = on_event or (lambda ev: None)
+        self.t0 = time.perf_counter()
+
+        # Normalize tasks format
+        if isinstance(tasks_cfg, list):
+            task_specs = tasks_cfg
+        elif isinstance(tasks_cfg, dict) and "tasks" in tasks_cfg:
+            task_specs = tasks_cfg["tasks"]
+        else:
+            raise ValueError("tasks.yaml must be a list, or a dict with key 'tasks'.")
+
+        self.outdir = Path(output_dir)
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        self.slug = _safe_slug(Path(pdf_path).stem)
+
+        # Run manifest + per-task checkpoints. A task's fingerprint covers its spec, agent, the
+        # LLM it resolves to (model, backend, fixture), the inputs and its dependencies'
+        # fingerprints, so a change invalidates everything downstream of it (without
+        # depends_on/context that means every later task).
+        self.task_ids: List[str] = []
+        for i, ts in enumerate(task_specs):
+            agent_name = ts.get("agent")
+            if not agent_name or agent_name not in self.agents_cfg:
+                raise ValueError(f"Task {i} references unknown agent '{agent_name}'.")
+            self.task_ids.append(ts.get("id") or ts.get("name") or f"task{i+1}")
+        self.deps = task_graph(task_specs, self.task_ids)
+        self.dag_mode = any("depends_on" in ts or "context" in ts for ts in task_specs)
+        self.spec_of = dict(zip(self.task_ids, task_specs))
+
+        inputs = {"pdf": str(pdf_path), "pdf_sha256": file_sha256(pdf_path), "top_k": top_k,
+                  "agents_sha256": fingerprint(agents_cfg), "tasks_sha256": fingerprint(task_specs)}
+        self.ckpt = RunCheckpoint(str(self.outdir / ".runs" / self.slug), inputs=inputs)
+        self.fps: Dict[str, str] = {}
+        for tid in topo_order(self.deps):
+            ts = self.spec_of[tid]
+            skip = ("stream",) if CONTEXT_COMPACTION else ("stream", "compact")  # no effect on the output
+            spec = {k: v for k, v in ts.items() if k not in skip}
+            agent = self.agents_cfg[ts["agent"]]
+            self.fps[tid] = fingerprint(inputs["pdf_sha256"], top_k, spec, agent,
+                                        llm_identity(_agent_model(agent), agent),
+                                        [self.fps[d] for d in self.deps[tid]])
+
+        self.saved: Dict[str, str] = {}
+        self.reused: Dict[str, str] = {}
+        if resume:
+            for tid in self.task_ids:
+                text = self.ckpt.cached(tid, self.fps[tid])
+                if text is not None:
+                    self.saved[tid] = _write_artifact(self.outdir, self.slug, tid, text)
+                    self.reused[tid] = text
+                    self.on_event(PipelineEvent("task", tid, self.saved[tid], reused=True))
+        if verbose and self.reused:
+            print(f"⏩ Resuming: reusing {len(self.reused)} checkpointed task(s): {', '.join(self.reused)}")
+        self.remaining = [tid for tid in self.task_ids if tid not in self.reused]
+        self.agents: Dict[str, Agent] = {}
+        self.task_agents: Dict[str, Agent] = {}  # tid -> the Agent instance executing it
+        self.tasks: Dict[str, Task] = {}
+        self.partials: Dict[str, PartialWriter] = {}
+        self.compaction: Dict[str, Dict[str, Any]] = {}  # tid -> mode, budget, raw/kept context tokens
+        self._crew_span: Optional[trace.Span] = None
+
+    def on_done(self, tid: str):
+        def _cb(output: Any) -> None:
+            text = _extract_text(output)
+            self._next_task_span(tid)
+            self.saved[tid] = _write_artifact(self.outdir, self.slug, tid, text)
+            self._close_partial(tid)
+            self.ckpt.save(tid, self.fps[tid], text, artifact=self.saved[tid])
+            self.on_event(PipelineEvent("task", tid, self.saved[tid],
+                                        elapsed=round(time.perf_counter() - self.t0, 3)))
+        return _cb
+
+    def _close_partial(self, tid: str) -> None:
+        partial = self.partials.pop(tid, None)
+        if partial is not None:
+            attach_partial(self.task_agents[tid].llm, None)
+            partial.finish()
+
+    def close_partials(self) -> None:
+        """Detach and remove the .partial previews of tasks that never completed (failure, cancel)."""
+        for tid in list(self.partials):
+            self._close_partial(tid)
+
+    def build(self) -> None:
+        # Build agents. A sequential crew runs one task at a time and shares them; in DAG mode
+        # tasks of the same agent may run concurrently, and crewai's agent executor, tools
+        # handler and memory are not thread-safe, so each task gets its own Agent (and LLM).
+        if not self.dag_mode:
+            run_tools = _run_tools(self.ctx)
+            self.agents = {name: _build_agent(name, spec, run_tools) for name, spec in self.agents_cfg.items()}
+        for tid in topo_order(self.deps):
+            if tid in self.reused:
+                continue
+            ts = self.spec_of[tid]
+            name = ts["agent"]
+            self.task_agents[tid] = (_build_agent(name, self.agents_cfg[name], _run_tools(self.ctx))
+                                     if self.dag_mode else self.agents[name])
+            compact = parse_spec(ts.get("compact"))
+            earlier = {d: self.reused[d] for d in self.deps[tid] if d in self.reused}
+            if compact:
+                query = f"{ts.get('description', '')}\n{ts.get('expected_output', '')}"
+                kept = {d: compact_text(text, compact["budget"], compact["mode"], query) for d, text in earlier.items()}
+                self.compaction[tid] = dict(compact, prior=(sum(map(count_tokens, earlier.values())),
+                                                            sum(map(count_tokens, kept.values()))))
+                earlier = kept
+            prior = "\n\n".join(f"## {d}\n{text}" for d, text in earlier.items())
+            context = [self.tasks[d] for d in self.deps[tid] if d in self.tasks] if self.dag_mode else None
+            self.tasks[tid] = _build_task(ts, self.task_agents[tid], callback=self.on_done(tid),
+                                          prior=prior, context=context,
+                                          compact=self._compactor(tid, query) if compact else None)
+            if ts.get("stream"):
+                # preview tokens in <artifact>.partial
+                self.partials[tid] = PartialWriter(f"{_artifact_path(self.outdir, self.slug, tid)}.partial")
+                attach_partial(self.task_agents[tid].llm, self.partials[tid])
+
+    def _compactor(self, tid: str, query: str) -> Callable[[Optional[str]], Optional[str]]:
+        """Compacts the earlier outputs crewai hands task `tid` as context, and counts the tokens."""
+        stats = self.compaction[tid]
+        def _compact(context: Optional[str]) -> Optional[str]:
+            out = compact_context(context or "", stats, query) if context else context
+            stats["context"] = (count_tokens(context or ""), count_tokens(out or ""))
+            trace.add(context_tokens_raw=stats["prior"][0] + stats["context"][0],
+                      context_tokens=stats["prior"][1] + stats["context"][1])
+            return out
+        return _compact
+
+    @contextmanager
+    def sequential_spans(self):
+        """Task spans for a sequential crew, which only reports completions: each task's span
+        runs from the previous completion to its own, and gets the tool/LLM calls in between."""
+        with trace.span("crew", tasks=len(self.remaining)) as sp:
+            if sp is not None and self.remaining:
+                sp.child = sp.tracer.start(f"task:{self.remaining[0]}", sp)
+            self._crew_span = sp
+            try:
+                yield
+            except BaseException as e:
+                if sp is not None and sp.child is not None:
+                    sp.tracer.end(sp.child, error=e)
+                    sp.child = None
+                raise
+            finally:
+                self._crew_span = None
+
+    def _next_task_span(self, tid: str) -> None:
+        sp = self._crew_span
+        if sp is None or sp.child is None or sp.child.name != f"task:{tid}":
+            return
+        sp.tracer.end(sp.child)
+        i = self.remaining.index(tid) + 1
+        sp.child = sp.tracer.start(f"task:{self.remaining[i]}", sp) if i < len(self.remaining) else None
+
+    def run_task(self, tid: str) -> Any:
+        with trace.span(f"task:{tid}", agent=self.spec_of[tid]["agent"]):
+            return self.single_crew(tid).kickoff()
+
+    async def arun_task(self, tid: str) -> Any:
+        with trace.span(f"task:{tid}", agent=self.spec_of[tid]["agent"]):
+            return await self.single_crew(tid).kickoff_async()
+
+    def single_crew(self, tid: str) -> Crew:
+        # DAG mode: each ready task runs as its own single-task crew; context comes from the
+        # dependency Task objects, whose outputs are set once they have finished.
+        return Crew(agents=[self.task_agents[tid]], tasks=[self.tasks[tid]], process=Process.sequential,
+                    verbose=self.verbose)
+
+    def sequential_crew(self) -> Crew:
+        ordered = [self.tasks[tid] for tid in self.remaining]
+        return Crew(agents=list(self.agents.values()), tasks=ordered, process=Process.sequential,
+                    verbose=self.verbose)
+
+    def collect_sequential(self, result: Any) -> None:
+        # Collect outputs in order
+        if isinstance(result, (list, tuple)):
+            outputs = dict(zip(self.remaining, result))
+        else:
+            outputs = {}
+            for tid in self.remaining:
+                t = self.tasks[tid]
+                out = getattr(t, "output", None) or getattr(t, "result", None)
+                outputs[tid] = out if out is not None else result
+        self.collect(outputs)
+
+    def collect(self, outputs: Dict[str, Any]) -> None:
+        # anything the task callbacks didn't persist is written now
+        for tid, payload in outputs.items():
+            if tid not in self.saved and payload is not None:
+                self.on_done(tid)(payload)
+
+    def finish(self) -> Dict[str, str]:
+        self.ckpt.finish()
+        saved = {tid: self.saved[tid] for tid in self.task_ids if tid in self.saved}
+        if self.verbose:
+            _print_summary(saved)
+            self._print_compaction()
+        self.on_event(PipelineEvent("complete", artifacts=saved,
+                                    elapsed=round(time.perf_counter() - self.t0, 3)))
+        return saved
+
+    def _print_compaction(self) -> None:
+        """Context and prompt tokens per compacted task, and what they would have been without.
+
+        Every LLM call of a task re-sends its context, so the tokens compaction saved once
+        are saved again on each call (tool-use turns included).
+        """
+        if not self.compaction:
+            return
+        tracer = trace.active_tracer()
+        totals = tracer.totals() if tracer is not None else {}
+        print("🗜️  Context compaction (tokens per task):")
+        for tid, st in self.compaction.items():
+            raw = st["prior"][0] + st.get("context", (0, 0))[0]
+            kept = st["prior"][1] + st.get("context", (0, 0))[1]
+            line = f" - {tid} [{st['mode']}, {st['budget']}/output]: context {raw} -> {kept}"
+            t = totals.get(f"task:{tid}")
+            if t and t["llm_calls"]:
+                line += (f"; prompt {t['prompt_tokens']} with, ~{t['prompt_tokens'] + (raw - kept) * t['llm_calls']}"
+                         f" without ({t['llm_calls']} LLM calls)")
+            print(line)
+
+def _print_summary(saved: Dict[str, str]) -> None:
+    print("✅ CrewAI pipeline complete. Artifacts:")
+    for k, v in saved.items():
+        print(f" - {k}: {v}")
+    stats = embedding_cache_stats()
+    if stats:
+        print(f"🧮 Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"(hit rate {stats['hit_rate']:.0%})")
+    q = query_cache_stats()
+    print(f"🔁 Query cache: {q['hits']} hits, {q['misses']} misses")
+    p = packing_stats()
+    if p["calls"]:
+        print(f"✂️  RAG output packing: {p['saved']} tokens saved over {p['calls']} calls "
+              f"({p['raw_tokens']} -> {p['tokens']})")
+    llm = llm_cache_stats()
+    if llm:
+        print(f"💾 LLM cache ({llm['mode']}): {llm['hits']} hits, {llm['misses']} misses")
 
 # ---------------- public entry ----------------
 def run_pipeline(
@@ -93,59 +444,120 @@ def run_pipeline(
     output_dir: str = "src/data/output",
     top_k: int = 6,
     verbose: bool = True,
+    batch_size: Optional[int] = None,
+    embed_workers: Optional[int] = None,
+    llm_cache: Optional[str] = None,
+    resume: bool = False,
+    max_concurrency: Optional[int] = None,
+    txt_cache: Optional[str] = None,
+    collection: Optional[str] = None,
 ) -> Dict[str, str]:
-    """Run Crew from YAML configs and save artifacts. Returns {task_id: filepath}."""
-    _ensure_vectorstore(pdf_path, top_k)
-
-    # Build agents
-    agents: Dict[str, Agent] = {name: _build_agent(name, spec) for name, spec in (agents_cfg or {}).items()}
-
-    # Normalize tasks format
-    if isinstance(tasks_cfg, list):
-        task_specs = tasks_cfg
-    elif isinstance(tasks_cfg, dict) and "tasks" in tasks_cfg:
-        task_specs = tasks_cfg["tasks"]
-    else:
-        raise ValueError("tasks.yaml must be a list, or a dict with key 'tasks'.")
-
-    tasks: List[Task] = []
-    task_ids: List[str] = []
-    for i, ts in enumerate(task_specs):
-        agent_name = ts.get("agent")
-        if not agent_name or agent_name not in agents:
-            raise ValueError(f"Task {i} references unknown agent '{agent_name}'.")
-        tasks.append(_build_task(ts, agents[agent_name]))
-        task_ids.append(ts.get("id") or ts.get("name") or f"task{i+1}")
-
-    crew = Crew(agents=list(agents.values()), tasks=tasks, process=Process.sequential, verbose=verbose)
-    result = crew.kickoff()
-
-    # Collect outputs in order
-    outputs: List[Any] = []
-    if isinstance(result, (list, tuple)):
-        outputs = list(result)
-    else:
-        for t in tasks:
-            out = getattr(t, "output", None) or getattr(t, "result", None)
-            outputs.append(out if out is not None else result)
-
-    outdir = Path(output_dir)
-    outdir.mkdir(parents=True, exist_ok=True)
-    slug = _safe_slug(Path(pdf_path).stem)
-
-    saved: Dict[str, str] = {}
-    for i, payload in enumerate(outputs):
-        text = _extract_text(payload)
-        tid  = task_ids[i] if i < len(task_ids) else f"task{i+1}"
-        ext  = _ext_for_task_id(tid)
-        path = outdir / f"{slug}-{tid}{ext}"
-        path.write_text(text, encoding="utf-8")
-        saved[tid] = str(path)
-
-    if verbose:
-        print("✅ CrewAI pipeline complete. Artifacts:")
-        for k, v in saved.items():
-            print(f" - {k}: {v}")
-
-    return saved
+    """Run Crew from YAML configs and save artifacts. Returns {task_id: filepath}.
+
+    Each task's output is written (artifact + checkpoint) as soon as it completes.
+    resume=True reuses checkpoints of tasks whose spec and inputs are unchanged.
+    If any task declares `depends_on`/`context`, tasks run as a DAG: each starts once its
+    dependencies are done, up to max_concurrency (default $TASK_CONCURRENCY or 4) at a time.
+    llm_cache: "on" | "off" | "refresh" for this run's LLM calls only; None keeps the process
+    setting (LLM_CACHE or src.llm.cache.configure).
+    txt_cache / collection default to the PDF's cached text and slug. Tool settings are
+    carried by a RunContext, so concurrent pipelines in one process stay isolated.
+    Per-stage spans go to <output_dir>/<slug>-trace.jsonl (or into the caller's tracer).
+    """
+    with use_llm_cache(llm_cache), _tracing(output_dir, pdf_path), trace.span("run_pipeline", pdf=str(pdf_path)):
+        ctx = _ensure_vectorstore(pdf_path, top_k, batch_size=batch_size, embed_workers=embed_workers,
+                                  verbose=verbose, txt_cache=txt_cache, collection=collection)
+        with use_context(ctx):
+            run = _Run(pdf_path, agents_cfg, tasks_cfg, ctx, output_dir, top_k, verbose, resume)
+            try:
+                if run.remaining:
+                    run.build()
+                    if run.dag_mode:
+                        results = run_dag(run.deps, run.run_task, max_workers=max_concurrency or TASK_CONCURRENCY,
+                                          done=list(run.reused))
+                        run.collect({tid: getattr(run.tasks[tid], "output", None) or results.get(tid)
+                                     for tid in run.remaining})
+                    else:
+                        with run.sequential_spans():
+                            result = run.sequential_crew().kickoff()
+                        run.collect_sequential(result)
+                return run.finish()
+            finally:
+                run.close_partials()
+
+async def run_pipeline_async(
+    pdf_path: str,
+    agents_cfg: Dict[str, Any],
+    tasks_cfg: Any,
+    output_dir: str = "src/data/output",
+    top_k: int = 6,
+    verbose: bool = False,
+    batch_size: Optional[int] = None,
+    embed_workers: Optional[int] = None,
+    llm_cache: Optional[str] = None,
+    resume: bool = False,
+    max_concurrency: Optional[int] = None,
+    txt_cache: Optional[str] = None,
+    collection: Optional[str] = None,
+    on_event: Optional[Callable[[PipelineEvent], None]] = None,
+) -> Dict[str, str]:
+    """Async run_pipeline: same arguments and result, built on Crew.kickoff_async.
+
+    PDF extraction, build_store, checkpoint/artifact writes run in worker threads, so the
+    event loop stays free and many documents can be multiplexed on it. Cancelling the
+    awaiting task stops scheduling further tasks (an LLM call already in flight finishes
+    in its thread). on_event is called (from worker threads) as each task completes.
+    """
+    with use_llm_cache(llm_cache), _tracing(output_dir, pdf_path), trace.span("run_pipeline", pdf=str(pdf_path)):
+        ctx = await asyncio.to_thread(
+            _ensure_vectorstore, pdf_path, top_k, batch_size=batch_size, embed_workers=embed_workers,
+            verbose=verbose, txt_cache=txt_cache, collection=collection)
+        if on_event:
+            on_event(PipelineEvent("vectorstore"))
+        with use_context(ctx):
+            run = await asyncio.to_thread(_Run, pdf_path, agents_cfg, tasks_cfg, ctx, output_dir, top_k,
+                                          verbose, resume, on_event)
+            try:
+                if run.remaining:
+                    run.build()
+                    if run.dag_mode:
+                        results = await arun_dag(run.deps, run.arun_task,
+                                                 max_workers=max_concurrency or TASK_CONCURRENCY,
+                                                 done=list(run.reused))
+                        outputs = {tid: getattr(run.tasks[tid], "output", None) or results.get(tid)
+                                   for tid in run.remaining}
+                        await asyncio.to_thread(run.collect, outputs)
+                    else:
+                        with run.sequential_spans():
+                            result = await run.sequential_crew().kickoff_async()
+                        await asyncio.to_thread(run.collect_sequential, result)
+                return await asyncio.to_thread(run.finish)
+            finally:
+                run.close_partials()
+
+async def stream_pipeline(pdf_path: str, agents_cfg: Dict[str, Any], tasks_cfg: Any,
+                          **kwargs) -> AsyncIterator[PipelineEvent]:
+    """Yield PipelineEvents while run_pipeline_async runs; the last one has kind="complete".
+
+    Leaving the loop early (break / cancellation) cancels the underlying run.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Optional[PipelineEvent]]" = asyncio.Queue()
+
+    def push(ev: PipelineEvent) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, ev)
 
+    runner = asyncio.ensure_future(run_pipeline_async(pdf_path, agents_cfg, tasks_cfg, on_event=push, **kwargs))
+    runner.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, None))
+    try:
+        while True:
+            ev = await queue.get()
+            if ev is None:
+                break
+            yield ev
+            if ev.kind == "complete":
+                break
+        await runner  # re-raise a failure from the run
+    finally:
+        if not runner.done():
+            runner.cancel()
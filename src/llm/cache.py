@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "src/data/cache/llm.sqlite")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# "off" | "on" | "refresh" (skip reads, overwrite entries). Opt-in: off unless LLM_CACHE is set.
+_MODES = {"0": "off", "false": "off", "no": "off", "off": "off",
+          "1": "on", "true": "on", "yes": "on", "on": "on", "refresh": "refresh"}
+
+def _env_mode() -> str:
+    return _MODES.get(os.getenv("LLM_CACHE", "0").strip().lower(), "off")
+
+class LLMCache:
+    """SQLite cache of LLM completions keyed by (model, messages, tools, temperature)."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_mb: float = LLM_CACHE_MAX_MB, mode: str = "on"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path, self.max_bytes, self.mode = path, int(max_mb * 1024 * 1024), mode
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+            "size INTEGER, used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_used ON llm (used)")
+
+    @staticmethod
+    def key(model: str, messages: Any, tools: Any = None, temperature: Optional[float] = None) -> str:
+        blob = json.dumps({"model": model, "messages": messages, "tools": tools, "temperature": temperature},
+                          sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.mode != "on":
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT response FROM llm WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE llm SET used=? WHERE key=?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        if self.mode == "off":
+            return
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            if self.mode == "refresh":
+                self.misses += 1
+            self._db.execute("INSERT OR REPLACE INTO llm VALUES (?, ?, ?, ?, ?)",
+                             (key, model, response, size, time.time()))
+            (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm").fetchone()
+            # evict least-recently-used rows until we are back under the size cap
+            while total > self.max_bytes:
+                row = self._db.execute("SELECT key, size FROM llm ORDER BY used LIMIT 1").fetchone()
+                if row is None or row[0] == key:
+                    break
+                self._db.execute("DELETE FROM llm WHERE key=?", (row[0],))
+                total -= row[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses}
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+# Per-run modes (use_mode) get their own LLMCache over the same file, one per (path, mode),
+# so a run scoped to "refresh" never changes what a concurrent "on" run sees.
+_scoped: ContextVar[Optional[str]] = ContextVar("llm_cache_mode", default=None)
+_stores: Dict[tuple, LLMCache] = {}
+
+def configure(mode: Optional[str] = None, path: str = LLM_CACHE_PATH) -> Optional[LLMCache]:
+    """(Re)configure the process-wide cache. mode=None reads LLM_CACHE from the environment."""
+    global _cache
+    mode = _MODES.get(str(mode).lower(), "off") if mode is not None else _env_mode()
+    with _cache_lock:
+        _cache = LLMCache(path=path, mode=mode) if mode != "off" else None
+    return _cache
+
+@contextmanager
+def use_mode(mode: Optional[str]) -> Iterator[None]:
+    """Cache mode for the LLM calls made inside this block only (threads and tasks started
+    from it inherit it). None keeps the process-wide setting (configure() / LLM_CACHE)."""
+    if mode is None:
+        yield
+        return
+    token = _scoped.set(_MODES.get(str(mode).lower(), "off"))
+    try:
+        yield
+    finally:
+        _scoped.reset(token)
+
+def get_cache() -> Optional[LLMCache]:
+    """The cache for the current context's mode, or None when caching is off."""
+    global _cache
+    mode = _scoped.get()
+    if mode is not None:
+        if mode == "off":
+            return None
+        path = _cache.path if _cache is not None else LLM_CACHE_PATH
+        with _cache_lock:
+            if _cache is not None and _cache.mode == mode:
+                return _cache
+            if (path, mode) not in _stores:
+                _stores[(path, mode)] = LLMCache(path=path, mode=mode)
+            return _stores[(path, mode)]
+    if _cache is None and _env_mode() != "off":
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(mode=_env_mode())
+    return _cache
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters of the cache in effect here ({} when off); scoped stores are shared per mode."""
+    cache = get_cache() if _scoped.get() is not None else _cache
+    return cache.stats() if cache is not None else {}
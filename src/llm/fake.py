@@ -0,0 +1,207 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+import yaml
+
+from src.llm.llms import BaseLLM, CachedLLM, TracedCalls, call_key
+
+# Offline LLM backends, selected by LLM_BACKEND (or `llm_backend:` per agent in agents.yaml):
+#   live      - the provider, through the LLM cache (default)
+#   record    - live, and every response is appended to the fixture file
+#   replay    - answers from the fixture file only; never touches the network
+#   synthetic - canned answers after a simulated latency, with scripted tool calls
+# replay and synthetic extend crewai's BaseLLM, not LLM: nothing of the provider client
+# (litellm, API keys, native provider routing) is built or called.
+LLM_FIXTURE = os.getenv("LLM_FIXTURE", "src/data/fixtures/llm.jsonl")
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", "250"))
+LLM_FAKE_JITTER_MS = float(os.getenv("LLM_FAKE_JITTER_MS", "0"))
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", "0"))
+LLM_FAKE_TOOL_CALLS = int(os.getenv("LLM_FAKE_TOOL_CALLS", "1"))
+LLM_FAKE_WORDS = int(os.getenv("LLM_FAKE_WORDS", "180"))
+LLM_FAKE_SCRIPT = os.getenv("LLM_FAKE_SCRIPT", "")
+
+def _text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(m.get("content") or "") if isinstance(m, dict) else str(m) for m in messages or [])
+
+# ---------------- record / replay ----------------
+class Fixture:
+    """JSONL of recorded calls: {"key", "model", "response"} per line, in call order.
+
+    Replay matches the exact call key first; when prompts drift (dates, tool output)
+    it falls back to the next unused recording for the same model, in recorded order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        self._by_model: Dict[str, deque] = defaultdict(deque)
+        self._used: set = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for i, line in enumerate(f):
+                    if line.strip():
+                        rec = json.loads(line)
+                        self._by_key[rec["key"]].append((i, rec["response"]))
+                        self._by_model[rec.get("model", "")].append((i, rec["response"]))
+
+    def append(self, key: str, model: str, response: str) -> None:
+        line = json.dumps({"key": key, "model": model, "response": response}, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _take(self, q: deque) -> Optional[str]:
+        while q:
+            i, response = q.popleft()
+            if i not in self._used:
+                self._used.add(i)
+                return response
+        return None
+
+    def lookup(self, key: str, model: str) -> str:
+        with self._lock:
+            out = self._take(self._by_key.get(key, deque()))
+            if out is None:
+                out = self._take(self._by_model.get(model, deque()))
+        if out is None:
+            raise RuntimeError(f"LLM replay: no recorded response left for {model} in {self.path}")
+        return out
+
+_fixtures: Dict[str, Fixture] = {}
+_fixtures_lock = threading.Lock()
+
+def get_fixture(path: str = LLM_FIXTURE) -> Fixture:
+    with _fixtures_lock:
+        if path not in _fixtures:
+            _fixtures[path] = Fixture(path)
+        return _fixtures[path]
+
+class RecordLLM(CachedLLM):
+    """Live (and cached) calls, each response appended to the fixture."""
+
+    def __init__(self, *args, fixture: str = LLM_FIXTURE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fixture = get_fixture(fixture)
+
+    def _cached_call(self, messages, *args, **kwargs):
+        out, hit = super()._cached_call(messages, *args, **kwargs)
+        if isinstance(out, str):
+            self._fixture.append(call_key(self, messages, args, kwargs), self.model, out)
+        return out, hit
+
+class OfflineLLM(TracedCalls, BaseLLM):
+    """Base of the backends that never reach a provider: ReAct text only, no native tool calls."""
+
+    provider_stream: ClassVar[bool] = False
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+class ReplayLLM(OfflineLLM):
+    """Answers only from a recorded fixture."""
+
+    def __init__(self, *args, fixture: str = LLM_FIXTURE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fixture = get_fixture(fixture)
+
+    def _cached_call(self, messages, *args, **kwargs):
+        return self._fixture.lookup(call_key(self, messages, args, kwargs), self.model), False
+
+# ---------------- synthetic ----------------
+def _load_script(path: str) -> List[Dict[str, Any]]:
+    """Optional YAML list of {match, tool_calls: [{tool, input}], response}; first match wins."""
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or []
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9-]{3,}")
+_ACTION_THOUGHT = "Thought: I should look this up in the PDF."
+_STOP = {"from", "with", "that", "this", "your", "return", "into", "have", "will", "must", "task", "using"}
+
+class SyntheticLLM(OfflineLLM):
+    """No provider at all: sleeps latency ± jitter, then answers in crewai's ReAct format.
+
+    While the agent's prompt offers pdf_rag_search it first emits LLM_FAKE_TOOL_CALLS
+    scripted Actions (crewai runs the real tool and feeds back an Observation), then a
+    Final Answer shaped like the task asks for: JSON, YAML or Markdown with [p.N] cites.
+    Jitter is seeded by the prompt, so runs are reproducible.
+    """
+
+    def __init__(self, *args, latency_ms: float = LLM_FAKE_LATENCY_MS, jitter_ms: float = LLM_FAKE_JITTER_MS,
+                 tool_calls: int = LLM_FAKE_TOOL_CALLS, words: int = LLM_FAKE_WORDS,
+                 script: str = LLM_FAKE_SCRIPT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._latency, self._jitter = latency_ms / 1000.0, jitter_ms / 1000.0
+        self._n_tools, self._words = tool_calls, words
+        self._script = _load_script(script)
+
+    def _cached_call(self, messages, *args, **kwargs):
+        key = call_key(self, messages, args, kwargs)
+        rng = random.Random(LLM_FAKE_SEED ^ int(key[:8], 16))
+        delay = self._latency + (rng.uniform(-self._jitter, self._jitter) if self._jitter else 0.0)
+        out = self._respond(_text(messages), rng)
+        partial = self.partial
+        if partial is None:
+            if delay > 0:
+                time.sleep(delay)
+            return out, False
+        # spread the latency over ~16 chunks, like a provider stream
+        step = max(1, len(out) // 16)
+        for i in range(0, len(out), step):
+            time.sleep(max(delay, 0.0) * step / len(out))
+            partial.write(out[i:i + step])
+        return out, False
+
+    def _plan(self, prompt: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        for entry in self._script:
+            if entry.get("match", "") in prompt:
+                return list(entry.get("tool_calls") or []), entry.get("response")
+        if "pdf_rag_search" not in prompt:
+            return [], None
+        words = [w for w in _WORD.findall(prompt.split("Current Task:")[-1]) if w.lower() not in _STOP][:8]
+        return [{"tool": "pdf_rag_search", "input": {"query": " ".join(words) or "key findings"}}] * self._n_tools, None
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        calls, response = self._plan(prompt)
+        done = prompt.count(_ACTION_THOUGHT)  # our own earlier Actions, echoed back by crewai
+        if done < len(calls):
+            call = calls[done]
+            return (f"{_ACTION_THOUGHT}\nAction: {call['tool']}\n"
+                    f"Action Input: {json.dumps(call.get('input') or {})}")
+        return "Thought: I now know the final answer\nFinal Answer: " + (response or self._canned(prompt, rng))
+
+    def _canned(self, prompt: str, rng: random.Random) -> str:
+        task = prompt.split("Current Task:")[-1]
+        vocab = [w.lower() for w in _WORD.findall(task) if w.lower() not in _STOP] or ["result"]
+        # crewai states the task's expected_output on this line; fall back to the whole task
+        marker = "expected criteria for your final answer:"
+        want = (task.split(marker)[-1].split("\n", 1)[0] if marker in task else task).lower()
+        sentence = lambda n: " ".join(rng.choice(vocab) for _ in range(n)).capitalize()
+        if "json" in want:
+            if "array" in want or "list" in want:
+                return json.dumps([{"claim": sentence(8), "status": "supported", "sources": ["p.1"]}])
+            return json.dumps({"title": sentence(6), "slug": "synthetic-post", "meta_description": sentence(18),
+                               "tags": sorted({rng.choice(vocab) for _ in range(4)})})
+        if "yaml" in want:
+            return yaml.safe_dump({"angle": sentence(6), "audience": sentence(4), "intent": "informational",
+                                   "entities": [rng.choice(vocab) for _ in range(3)],
+                                   "outline": [sentence(4) for _ in range(4)]}, sort_keys=False)
+        paras, left = [], self._words
+        while left > 0:
+            n = min(left, 60)
+            paras.append(f"{sentence(n)} [p.{rng.randint(1, 9)}].")
+            left -= n
+        return f"## {sentence(5)}\n\n" + "\n\n".join(paras)
+
+BACKENDS = {"record": RecordLLM, "replay": ReplayLLM, "synthetic": SyntheticLLM}
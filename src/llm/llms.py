@@ -0,0 +1,149 @@
+import os
+import threading
+import weakref
+from typing import Any, ClassVar, Dict, Optional
+
+from crewai import LLM
+
+try:
+    from crewai import BaseLLM
+except ImportError:  # older crewai without BaseLLM: its LLM never routes to native providers
+    BaseLLM = LLM
+
+from src.llm.cache import LLMCache, get_cache
+from src.tools.tokens import count_tokens
+from src.utils import trace
+
+def _prompt_tokens(messages) -> int:
+    if isinstance(messages, str):
+        return count_tokens(messages)
+    return sum(count_tokens(str(m.get("content") or "")) if isinstance(m, dict) else count_tokens(str(m))
+               for m in messages or [])
+
+def call_key(llm, messages, args, kwargs) -> str:
+    """Cache key of one call(); `tools` counts whether passed by keyword or positionally."""
+    tools = kwargs["tools"] if "tools" in kwargs else (args[0] if args else None)
+    return LLMCache.key(llm.model, messages, tools, getattr(llm, "temperature", None))
+
+# llm -> PartialWriter; kept off the instance so crewai's LLM classes need no extra fields.
+# Weak keys: an entry never outlives its LLM, so a later LLM can't inherit a stale writer.
+_partials: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+class TracedCalls:
+    """call() shared by the live and offline LLMs: "llm" trace span and token counts around
+    _cached_call(messages, *args, **kwargs) -> (answer, cache_hit)."""
+
+    provider_stream: ClassVar[bool] = True  # tokens come from the provider's stream (fake backends emit their own)
+
+    @property
+    def partial(self):
+        """PartialWriter receiving streamed answer tokens, or None (see attach_partial)."""
+        return _partials.get(self)
+
+    def call(self, messages, *args, **kwargs):
+        # pass-through signature: crewai's LLM.call grew tools/available_functions/... over releases
+        partial = self.partial
+        if partial is not None:
+            partial.reset()
+        with trace.span("llm", model=self.model) as sp:
+            out, hit = self._cached_call(messages, *args, **kwargs)
+            if sp is None:
+                return out
+            # token counts are local tokenizer estimates; crewai doesn't hand back provider usage here
+            trace.add(llm_calls=1, llm_cache_hits=int(hit), prompt_tokens=_prompt_tokens(messages),
+                      completion_tokens=count_tokens(out) if isinstance(out, str) else 0)
+        return out
+
+    def _cached_call(self, messages, *args, **kwargs):
+        raise NotImplementedError
+
+class CachedLLM(TracedCalls, LLM):
+    """crewai LLM that answers repeated calls from the on-disk LLM cache (see src/llm/cache.py)."""
+
+    def _cached_call(self, messages, *args, **kwargs):
+        cache = get_cache()
+        if cache is None:
+            return LLM.call(self, messages, *args, **kwargs), False
+        key = call_key(self, messages, args, kwargs)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit, True
+        out = LLM.call(self, messages, *args, **kwargs)
+        if isinstance(out, str) and out:
+            cache.put(key, self.model, out)
+        return out, False
+
+# ---------------- token streaming ----------------
+_listening = False
+_listen_lock = threading.Lock()
+
+def _listen_for_chunks() -> bool:
+    """Forward crewai's LLMStreamChunkEvent to the emitting LLM's PartialWriter (registered once)."""
+    global _listening
+    with _listen_lock:
+        if _listening:
+            return True
+        try:
+            from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+        except ImportError:
+            try:
+                from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+            except ImportError:  # crewai without streaming events: no preview, artifacts unaffected
+                return False
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _on_chunk(source, event):
+            sink = getattr(source, "partial", None)
+            if sink is not None:
+                sink.write(event.chunk)
+
+        _listening = True
+        return True
+
+def attach_partial(llm: BaseLLM, writer) -> None:
+    """Stream llm's answers into writer (a PartialWriter); writer=None detaches."""
+    if not isinstance(llm, TracedCalls):
+        return
+    if writer is None:
+        _partials.pop(llm, None)
+        return
+    _partials[llm] = writer
+    if llm.provider_stream and _listen_for_chunks():
+        llm.stream = True
+
+def _backend(spec: Dict[str, Any]) -> str:
+    return str(spec.get("llm_backend") or os.getenv("LLM_BACKEND", "live")).strip().lower()
+
+def llm_identity(model: str, spec: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """What build_llm(model, spec) resolves to: model, backend and record/replay fixture.
+
+    Part of each task's checkpoint fingerprint, so outputs of one backend are never resumed
+    as another's (e.g. a synthetic run followed by --resume on the live provider).
+    """
+    spec = spec or {}
+    backend = _backend(spec)
+    fixture = None
+    if backend in ("record", "replay"):
+        from src.llm.fake import LLM_FIXTURE
+        fixture = spec.get("llm_fixture") or LLM_FIXTURE
+    return {"model": model, "backend": backend, "fixture": fixture}
+
+def build_llm(model: str, spec: Optional[Dict[str, Any]] = None) -> BaseLLM:
+    """LLM for an agent spec from agents.yaml (model, optional temperature).
+
+    `llm_backend` (or $LLM_BACKEND): live | record | replay | synthetic, see src/llm/fake.py;
+    `llm_fixture` (or $LLM_FIXTURE) is the record/replay file.
+    """
+    spec = spec or {}
+    kwargs: Dict[str, Any] = {"model": model}
+    if spec.get("temperature") is not None:
+        kwargs["temperature"] = float(spec["temperature"])
+    backend = _backend(spec)
+    if backend == "live":
+        return CachedLLM(**kwargs)
+    from src.llm.fake import BACKENDS
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown llm_backend '{backend}' (expected live, {', '.join(BACKENDS)}).")
+    if spec.get("llm_fixture") and backend in ("record", "replay"):
+        kwargs["fixture"] = spec["llm_fixture"]
+    return BACKENDS[backend](**kwargs)
@@ -2,23 +2,150 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
+import sys
+import json
+import time
 import yaml
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from src.crew import run_pipeline
-from src.tools.pdf_tools import load_pdf_text  # uses your existing PDF util
+from src.utils import trace
+from src.utils.assemble import main as assemble_main
+
+# src.crew (crewai, chromadb, litellm) and pdf_tools (pypdf) are imported inside the
+# functions that run a pipeline, so --help, argument errors and the helpers stay fast.
+# scripts/import_budget.py guards this.
 
 def load_yaml(path: Path):
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+def _pipeline_kwargs(args) -> dict:
+    return dict(
+        top_k=args.top_k,
+        verbose=not args.quiet,
+        batch_size=args.batch_size,
+        embed_workers=args.embed_workers,
+        llm_cache=args.llm_cache,
+        resume=args.resume,
+        max_concurrency=args.max_concurrency,
+    )
+
+def _assemble(saved: dict, output_dir: Path, slug: str):
+    """Assemble <slug>.md from the post + SEO JSON artifacts, as `make assemble` does."""
+    post = saved.get("post")
+    seo = next((p for tid, p in saved.items() if "seo" in tid and p.endswith(".json")), None)
+    if not (post and seo):
+        return None
+    out = output_dir / f"{slug}.md"
+    assemble_main(post, seo, str(out))
+    return str(out)
+
+def _list_pdfs(args):
+    if args.pdf:
+        return [args.pdf]
+    if args.pdf_dir:
+        return sorted(str(p) for p in Path(args.pdf_dir).glob("*.pdf"))
+    lines = Path(args.pdf_list).read_text(encoding="utf-8").splitlines()
+    return [ln.strip() for ln in lines if ln.strip() and not ln.strip().startswith("#")]
+
+def process_pdf(pdf: str, agents, tasks, root: Path, output_dir: Path,
+                tracer: "trace.Tracer" = None, **kwargs) -> dict:
+    """Run one PDF end to end (text cache, pipeline, assemble); never raises.
+
+    Returns a summary row: pdf, slug, status ("ok"/"error"), artifacts, assembled, error,
+    seconds and trace (path of the JSONL span trace, recorded into `tracer` if given).
+    """
+    from src.crew import _safe_slug, run_pipeline, trace_file
+    from src.tools.pdf_tools import cached_pdf_text
+
+    slug = _safe_slug(Path(pdf).stem)
+    t0 = time.perf_counter()
+    row = {"pdf": pdf, "slug": slug, "status": "ok"}
+    tracer = tracer or trace.Tracer()
+    try:
+        with trace.use_tracer(tracer), trace.span("main", pdf=pdf):
+            with trace.span("pdf_text"):
+                txt_cache = cached_pdf_text(pdf, cache_dir=str(root / "data" / "cache" / "pdf-text"))
+            saved = run_pipeline(pdf, agents, tasks, output_dir=str(output_dir), txt_cache=txt_cache,
+                                 collection=slug, **kwargs)
+            row["artifacts"] = saved
+            with trace.span("assemble"):
+                row["assembled"] = _assemble(saved, output_dir, slug)
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - t0, 2)
+    row["trace"] = tracer.write(trace_file(str(output_dir), pdf))
+    return row
+
+def run_batch(pdfs, agents, tasks, args, root: Path) -> list:
+    """Run many PDFs in this process (one import + Chroma client), `--jobs` at a time.
+
+    Every PDF gets its own collection and text cache, is assembled when the task set
+    produces a post + SEO JSON, and lands in <output>/batch-summary.json. Raises
+    ValueError, before anything runs, when two PDFs would get the same slug.
+    """
+    from src.crew import _safe_slug
+
+    # The slug names the collection, artifacts, checkpoint dir and trace; two PDFs that
+    # share one (a/paper.pdf, b/paper.pdf) would overwrite each other's runs.
+    seen = {}
+    for pdf in pdfs:
+        seen.setdefault(_safe_slug(Path(pdf).stem), []).append(pdf)
+    clashes = {slug: paths for slug, paths in seen.items() if len(paths) > 1}
+    if clashes:
+        raise ValueError("PDFs with the same file name would share outputs: "
+                         + "; ".join(", ".join(paths) for paths in clashes.values()))
+
+    output_dir = root / "data" / "output"
+    kwargs = _pipeline_kwargs(args)  # llm_cache included: run_pipeline scopes it to each run
+
+    def one(pdf: str) -> dict:
+        tracer = trace.Tracer()
+        row = process_pdf(pdf, agents, tasks, root, output_dir, tracer=tracer, **kwargs)
+        print(f"{'✅' if row['status'] == 'ok' else '❌'} {pdf} ({row['seconds']}s)")
+        if args.trace:
+            print(f"🧭 {pdf}\n{tracer.summary()}")
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        rows = list(pool.map(one, pdfs))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = output_dir / "batch-summary.json"
+    summary.write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding="utf-8")
+    ok = sum(r["status"] == "ok" for r in rows)
+    print(f"📊 Batch: {ok}/{len(rows)} PDFs ok. Summary: {summary}")
+    return rows
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--pdf", required=True, help="Path to input PDF")
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument("--pdf", help="Path to input PDF")
+    inputs.add_argument("--pdf-dir", help="Batch mode: process every *.pdf in this directory")
+    inputs.add_argument("--pdf-list", help="Batch mode: file with one PDF path per line")
+    parser.add_argument("--jobs", type=int, default=2, help="Batch mode: PDFs processed concurrently")
     parser.add_argument("--top-k", type=int, default=6, help="RAG retrieval results per sub-query")
     parser.add_argument("--quiet", action="store_true", help="Suppress agent logs")
+    parser.add_argument("--trace", action="store_true",
+                        help="Print a per-stage timing/token table (the JSONL trace is always written)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Chunks per embedding/upsert batch (default: $RAG_BATCH_SIZE or 128)")
+    parser.add_argument("--embed-workers", type=int, default=None,
+                        help="Embedding threads running ahead of upserts (default: $RAG_EMBED_WORKERS or 2)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse checkpointed outputs of tasks whose spec and inputs are unchanged")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help="Max tasks running at once when tasks.yaml declares depends_on (default: $TASK_CONCURRENCY or 4)")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument("--llm-cache", dest="llm_cache", action="store_const", const="on",
+                       help="Reuse cached LLM responses for identical calls (default: $LLM_CACHE)")
+    cache.add_argument("--no-llm-cache", dest="llm_cache", action="store_const", const="off",
+                       help="Disable the LLM response cache")
+    cache.add_argument("--refresh-cache", dest="llm_cache", action="store_const", const="refresh",
+                       help="Ignore cached LLM responses but store the new ones")
     args = parser.parse_args()
 
     # src/ as root for configs and cache
@@ -28,20 +155,32 @@ if __name__ == "__main__":
     agents = load_yaml(root / "agents.yaml")
     tasks  = load_yaml(root / "tasks.yaml")
 
-    # Build/update a TXT cache for RAG tools (consumed by pdf_rag_search)
-    txt_cache = root / "data" / "input" / "current.txt"   # -> src/data/input/current.txt
-    txt_cache.parent.mkdir(parents=True, exist_ok=True)
-    txt_cache.write_text(load_pdf_text(args.pdf), encoding="utf-8", errors="ignore")
+    if not args.pdf:
+        try:
+            rows = run_batch(_list_pdfs(args), agents, tasks, args, root)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(0 if all(r["status"] == "ok" for r in rows) else 1)
 
-    # Expose to tools
-    os.environ["PDF_TXT_CACHE"] = str(txt_cache)
+    from src.crew import run_pipeline, trace_file
+    from src.tools.pdf_tools import cached_pdf_text
 
-    # Run your Crew pipeline (printing handled inside run_pipeline)
-    _ = run_pipeline(
-        args.pdf,
-        agents,
-        tasks,
-        top_k=args.top_k,
-        verbose=not args.quiet
-    )
+    output_dir = str(root / "data" / "output")
+    tracer = trace.Tracer()
+    try:
+        with trace.use_tracer(tracer), trace.span("main", pdf=args.pdf):
+            # Content-addressed TXT cache for RAG tools (consumed by pdf_rag_search);
+            # an unchanged PDF skips pypdf entirely on re-runs.
+            with trace.span("pdf_text"):
+                txt_cache = cached_pdf_text(args.pdf, cache_dir=str(root / "data" / "cache" / "pdf-text"))
+
+            # Run your Crew pipeline (printing handled inside run_pipeline)
+            _ = run_pipeline(args.pdf, agents, tasks, output_dir=output_dir, txt_cache=txt_cache,
+                             **_pipeline_kwargs(args))
+    finally:
+        # next to the artifacts, as in process_pdf
+        path = tracer.write(trace_file(output_dir, args.pdf))
+        if args.trace:
+            print(tracer.summary())
+            print(f"🧭 Trace: {path}")
 
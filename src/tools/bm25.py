@@ -0,0 +1,112 @@
+import io
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.checkpoint import atomic_write
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_STOP = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "which with we our not but".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens that keep gene/drug codes and decimals whole (IL-6, BRCA1, 0.05)."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOP]
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, stored as per-term posting arrays.
+
+    Per-posting weights (idf * saturated tf with length normalisation) are computed
+    once at build time, so scoring a query is a handful of np.add.at calls.
+    """
+
+    def __init__(self, ids: List[str], vocab: Dict[str, int], indptr: np.ndarray,
+                 docs: np.ndarray, weights: np.ndarray, version: str = ""):
+        self.ids, self.vocab, self.version = ids, vocab, version
+        self.indptr, self.docs, self.weights = indptr, docs, weights
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, List[str]]], version: str = "",
+              k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        ids: List[str] = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for doc_idx, (cid, tokens) in enumerate(items):
+            ids.append(cid)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_idx, tf))
+
+        n_docs = len(ids)
+        dl = np.asarray(lengths, dtype=np.float32)
+        avgdl = float(dl.mean()) if n_docs else 1.0
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for term, i in vocab.items():
+            indptr[i + 1] = len(postings[term])
+        indptr = np.cumsum(indptr)
+        docs = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        idf = np.empty(indptr[-1], dtype=np.float32)
+        for term, i in vocab.items():
+            plist = postings[term]
+            lo, hi = indptr[i], indptr[i + 1]
+            docs[lo:hi] = [d for d, _ in plist]
+            tfs[lo:hi] = [tf for _, tf in plist]
+            df = len(plist)
+            idf[lo:hi] = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * dl[docs] / max(avgdl, 1e-9)) if n_docs else 0.0
+        weights = (idf * tfs * (k1 + 1.0) / (tfs + norm)).astype(np.float32)
+        return cls(ids, vocab, indptr, docs, weights, version)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self.vocab.get(term)
+            if i is not None:
+                lo, hi = self.indptr[i], self.indptr[i + 1]
+                np.add.at(out, self.docs[lo:hi], self.weights[lo:hi])
+        return out
+
+    def top(self, query: str, k: int) -> List[Tuple[str, float]]:
+        s = self.scores(query)
+        hits = np.flatnonzero(s)
+        if hits.size == 0:
+            return []
+        if hits.size > k:
+            hits = hits[np.argpartition(-s[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-s[hits], kind="stable")]
+        return [(self.ids[i], float(s[i])) for i in hits]
+
+    # ---------------- persistence ----------------
+    def save(self, path: str) -> None:
+        terms = sorted(self.vocab, key=self.vocab.get)
+        buf = io.BytesIO()
+        np.savez(buf, ids=np.asarray(self.ids), terms=np.asarray(terms), indptr=self.indptr,
+                 docs=self.docs, weights=self.weights, version=np.asarray(self.version))
+        atomic_write(path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                terms = z["terms"].tolist()
+                return cls(z["ids"].tolist(), {t: i for i, t in enumerate(terms)}, z["indptr"],
+                           z["docs"], z["weights"], str(z["version"]))
+        except (OSError, ValueError, KeyError):
+            return None
+
+def rrf_fuse(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion of several best-first id lists."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, cid in enumerate(ranking):
+            fused[cid] = fused.get(cid, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda kv: -kv[1])
@@ -0,0 +1,108 @@
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.tools.tokens import count_tokens, get_encoder
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "320"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "48"))
+
+_PAGE_MARK = re.compile(r"^\[p\.(\d+)\]\s*$", re.M)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n")
+
+def iter_pages_from_text(text: str) -> Iterator[Tuple[int, str]]:
+    """Split load_pdf_text output back into (page_no, text). Text without markers is page 1."""
+    marks = list(_PAGE_MARK.finditer(text))
+    if not marks:
+        yield 1, text
+        return
+    if text[:marks[0].start()].strip():
+        yield 1, text[:marks[0].start()]
+    for m, nxt in zip(marks, marks[1:] + [None]):
+        yield int(m.group(1)), text[m.end():nxt.start() if nxt else len(text)]
+
+def _sentences(page_text: str) -> Iterator[str]:
+    for s in _SENTENCE_END.split(page_text):
+        s = " ".join(s.split())
+        if s:
+            yield s
+
+def _split_long(sentence: str, budget: int) -> Iterator[str]:
+    """Hard-split a single sentence that alone exceeds the budget, on word boundaries."""
+    words, buf, n = sentence.split(), [], 0
+    for w in words:
+        wt = count_tokens(" " + w)
+        if buf and n + wt > budget:
+            yield " ".join(buf)
+            buf, n = [], 0
+        buf.append(w); n += wt
+    if buf:
+        yield " ".join(buf)
+
+def _marker(page: int) -> str:
+    return f"[p.{page}]"
+
+def iter_token_chunks(pages: Iterable[Tuple[int, str]], max_tokens: int = CHUNK_TOKENS,
+                      overlap: int = CHUNK_OVERLAP) -> Iterator[Tuple[str, Dict]]:
+    """Stream (chunk_text, metadata) packed to at most max_tokens without cutting sentences.
+
+    Pages stay intact as units of citation: a chunk carries a [p.N] marker wherever
+    a page starts inside it (and at its head), and records page_start/page_end. Marker
+    tokens count towards max_tokens. The last ~overlap tokens of sentences are repeated
+    at the start of the next chunk, as far as they fit next to its first new sentence.
+    """
+    get_encoder()  # resolve the encoder once, outside the loop
+    overlap = max(0, min(overlap, max_tokens // 2))
+    buf: List[Tuple[int, str, int]] = []  # (page, sentence, tokens)
+    n_tokens, n = 0, 0
+    fresh = False  # buf holds something beyond the carried-over overlap
+
+    def cost(items: List[Tuple[int, str, int]]) -> int:
+        """Tokens of items once emitted: sentences plus a marker per page run."""
+        total, cur = 0, None
+        for page, _, t in items:
+            if page != cur:
+                total += count_tokens(_marker(page))
+                cur = page
+            total += t
+        return total
+
+    def added(page: int, t: int) -> int:
+        """Tokens appending a (page, t) sentence to buf costs, marker included."""
+        return t + (count_tokens(_marker(page)) if not buf or buf[-1][0] != page else 0)
+
+    def emit():
+        parts, cur = [], None
+        for page, sent, _ in buf:
+            if page != cur:
+                parts.append(_marker(page))
+                cur = page
+            parts.append(sent)
+        md = {"source": "pdf", "chunk": n, "page_start": buf[0][0], "page_end": buf[-1][0],
+              "tokens": n_tokens}
+        return " ".join(parts), md
+
+    for page, page_text in pages:
+        budget = max(1, max_tokens - count_tokens(_marker(page)))  # a lone piece still needs its marker
+        for sent in _sentences(page_text):
+            st = count_tokens(sent)
+            pieces = [(sent, st)] if st <= budget else [(p, count_tokens(p)) for p in _split_long(sent, budget)]
+            for piece, pt in pieces:
+                if buf and n_tokens + added(page, pt) > max_tokens:
+                    yield emit()
+                    n += 1
+                    # carry the tail of the previous chunk forward as overlap, dropping its
+                    # oldest sentences until it fits next to this piece
+                    tail: List[Tuple[int, str, int]] = []
+                    for item in reversed(buf):
+                        if sum(t for _, _, t in tail) + item[2] > overlap:
+                            break
+                        tail.insert(0, item)
+                    while tail and cost(tail + [(page, piece, pt)]) > max_tokens:
+                        tail.pop(0)
+                    buf, n_tokens, fresh = tail, cost(tail), False
+                n_tokens += added(page, pt)
+                buf.append((page, piece, pt))
+                fresh = True
+    if buf and fresh:
+        yield emit()
@@ -0,0 +1,138 @@
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.tools.bm25 import tokenize
+from src.tools.tokens import count_tokens
+
+# Context compaction: what a task sees of earlier tasks' outputs, configured per task
+# in tasks.yaml with `compact:` (see there). Each earlier output is cut to `budget`
+# tokens, outputs already within budget are passed through untouched.
+#   extractive - the sentences that best cover the output's frequent terms and the
+#                reading task's description, kept in document order (default)
+#   excerpt    - leading sentences of every section, round-robin, until the budget
+CONTEXT_BUDGET = int(os.getenv("CONTEXT_BUDGET", "600"))
+CONTEXT_COMPACTION = os.getenv("CONTEXT_COMPACTION", "1") not in ("0", "false", "no")  # 0: ignore `compact:`
+MODES = ("extractive", "excerpt")
+
+CREW_DIVIDER = "\n\n----------\n\n"  # how crewai joins the outputs it passes as context
+
+_HEADING = re.compile(r"^\s*#{1,6}\s")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_EVIDENCE = re.compile(r"\[p\.\d+|\d")  # citations and figures are worth keeping
+GAP = "…"
+
+def parse_spec(value: Any) -> Optional[Dict[str, Any]]:
+    """A task's `compact:` value -> {"mode", "budget"}, or None when compaction is off.
+
+    Accepts true, a token budget, a mode name, or {mode, budget}.
+    """
+    if value in (None, False) or not CONTEXT_COMPACTION:
+        return None
+    spec = {"mode": "extractive", "budget": CONTEXT_BUDGET}
+    if isinstance(value, bool):
+        pass
+    elif isinstance(value, int):
+        spec["budget"] = value
+    elif isinstance(value, str):
+        spec["mode"] = value
+    elif isinstance(value, dict):
+        spec.update({k: value[k] for k in ("mode", "budget") if k in value})
+    else:
+        raise ValueError(f"compact: expected true, a budget, a mode or a mapping, got {value!r}")
+    if spec["mode"] not in MODES:
+        raise ValueError(f"compact: unknown mode {spec['mode']!r} (expected one of {', '.join(MODES)})")
+    spec["budget"] = int(spec["budget"])
+    return spec
+
+# ---------------- units ----------------
+def _units(text: str) -> List[Tuple[int, int, str, bool]]:
+    """(line, section, text, is_heading) for every heading and sentence, in order."""
+    out, section = [], 0
+    for i, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        if _HEADING.match(line):
+            section += 1
+            out.append((i, section, line.rstrip(), True))
+            continue
+        for sent in _SENTENCE.split(line.rstrip()):
+            if sent.strip():
+                out.append((i, section, sent, False))
+    return out
+
+def _render(units: List[Tuple[int, int, str, bool]], keep: set) -> str:
+    """Kept sentences (plus their section headings), line breaks preserved, cuts marked with GAP."""
+    sections = {units[j][1] for j in keep}
+    out: List[str] = []
+    cur, gap = None, False
+    for j, (line, section, text, heading) in enumerate(units):
+        if j not in keep and not (heading and section in sections):
+            gap = True
+            continue
+        if gap and out:
+            out.append(GAP)
+            cur = None
+        gap = False
+        if line == cur:
+            out[-1] += " " + text.strip()
+        else:
+            out.append(text)
+            cur = line
+    if gap and out:
+        out.append(GAP)
+    return "\n".join(out)
+
+def _fit(units, order: List[int], budget: int) -> set:
+    """Greedily take units in `order` while they fit; a unit's heading is charged once."""
+    keep, charged, used = set(), set(), 0
+    heading_cost = {u[1]: count_tokens(u[2]) + 1 for u in units if u[3]}
+    for j in order:
+        _, section, text, _ = units[j]
+        cost = count_tokens(text) + 1 + (heading_cost.get(section, 0) if section not in charged else 0)
+        if used + cost > budget:
+            continue  # a shorter unit further down may still fit
+        keep.add(j); charged.add(section)
+        used += cost
+    return keep
+
+# ---------------- strategies ----------------
+def _extractive(units, query: str) -> List[int]:
+    """Sentence order by term coverage: frequent terms of the text plus terms of the reading task."""
+    sents = [j for j, u in enumerate(units) if not u[3]]
+    words = {j: set(tokenize(units[j][2])) for j in sents}
+    tf = Counter(w for j in sents for w in words[j])
+    asked = set(tokenize(query))
+    def score(j):
+        ws = words[j]
+        if not ws:
+            return 0.0
+        s = sum(tf[w] for w in ws) / len(ws) ** 0.5 + 2.0 * len(ws & asked)
+        return s * (1.25 if _EVIDENCE.search(units[j][2]) else 1.0)
+    return sorted(sents, key=lambda j: (-score(j), j))
+
+def _excerpt(units, query: str) -> List[int]:
+    """Sentence order round-robin over sections: every section's first sentence, then its second..."""
+    by_section: Dict[int, List[int]] = {}
+    for j, u in enumerate(units):
+        if not u[3]:
+            by_section.setdefault(u[1], []).append(j)
+    depth = max((len(v) for v in by_section.values()), default=0)
+    return [v[k] for k in range(depth) for v in by_section.values() if k < len(v)]
+
+_STRATEGIES = {"extractive": _extractive, "excerpt": _excerpt}
+
+def compact_text(text: str, budget: int, mode: str = "extractive", query: str = "") -> str:
+    """One earlier output cut to about `budget` tokens; unchanged if it already fits."""
+    if count_tokens(text) <= budget:
+        return text
+    units = _units(text)
+    return _render(units, _fit(units, _STRATEGIES[mode](units, query), budget))
+
+def compact_context(context: str, spec: Dict[str, Any], query: str = "") -> str:
+    """crewai's assembled context (outputs joined by CREW_DIVIDER), each output compacted."""
+    if not context:
+        return context
+    return CREW_DIVIDER.join(compact_text(part, spec["budget"], spec["mode"], query)
+                             for part in context.split(CREW_DIVIDER))
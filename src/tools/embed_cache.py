@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "src/data/cache/embeddings.sqlite")
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "500000"))
+
+def _text_hash(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by (model, sha1(text)), evicted least-recently-used."""
+
+    def __init__(self, path: str = EMBED_CACHE_PATH, max_rows: int = EMBED_CACHE_MAX_ROWS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path, self.max_rows = path, max_rows
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS emb (model TEXT, hash TEXT, vec BLOB, used REAL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS emb_used ON emb (used)")
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):  # stay under SQLite's bound-parameter limit
+                part = hashes[i:i + 500]
+                q = f"SELECT hash, vec FROM emb WHERE model=? AND hash IN ({','.join('?' * len(part))})"
+                for h, blob in self._db.execute(q, [model, *part]):
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE emb SET used=? WHERE model=? AND hash=?",
+                                     [(now, model, h) for h in found])
+            self.hits += len(found)
+            self.misses += len(set(hashes)) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items.items()]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO emb VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+            (n,) = self._db.execute("SELECT COUNT(*) FROM emb").fetchone()
+            if n > self.max_rows:
+                self._db.execute(
+                    "DELETE FROM emb WHERE rowid IN (SELECT rowid FROM emb ORDER BY used LIMIT ?)",
+                    (n - self.max_rows,),
+                )
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+def embedder_id(ef) -> str:
+    """Cache-key label for an embedding function: its class plus the model it reports, if any."""
+    cls = type(ef)
+    model = getattr(ef, "model_name", None) or getattr(ef, "MODEL_NAME", None)
+    if model is None and callable(getattr(ef, "name", None)):
+        try:
+            model = ef.name()
+        except Exception:
+            model = None
+    return f"{cls.__module__}.{cls.__qualname__}" + (f":{model}" if model else "")
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function that serves repeated texts (documents and queries) from EmbeddingCache.
+
+    Vectors are keyed by embedder_id(inner), so swapping the embedder never reuses another's vectors.
+    """
+
+    def __init__(self, inner, model_name: Optional[str] = None, cache: Optional[EmbeddingCache] = None):
+        self.inner = inner
+        self.model_name = model_name or embedder_id(inner)
+        self.cache = cache or EmbeddingCache()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        hashes = [_text_hash(s) for s in input]
+        found = self.cache.get_many(self.model_name, list(dict.fromkeys(hashes)))
+        missing = list(dict.fromkeys(h for h in hashes if h not in found))
+        if missing:
+            wanted, first = set(missing), {}
+            for h, s in zip(hashes, input):
+                if h in wanted:
+                    first.setdefault(h, s)
+            fresh = self.inner([first[h] for h in missing])
+            new = {h: np.asarray(v, dtype=np.float32) for h, v in zip(missing, fresh)}
+            self.cache.put_many(self.model_name, new)
+            found.update(new)
+        return [found[h] for h in hashes]
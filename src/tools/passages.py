@@ -0,0 +1,50 @@
+import os
+import threading
+from typing import Any, Dict, List
+
+from src.tools.bm25 import BM25Index, tokenize
+from src.tools.chunking import iter_pages_from_text
+
+PASSAGE_CHARS = 600   # consecutive lines of a page are merged into passages of about this size
+
+# txt path -> ((mtime_ns, size), passages, index); rebuilt only when the file changes
+_text_indexes: Dict[str, Any] = {}
+_text_lock = threading.Lock()
+
+def _passages(text: str):
+    for page, page_text in iter_pages_from_text(text):
+        buf, size = [], 0
+        for line in page_text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            buf.append(line)
+            size += len(line) + 1
+            if size >= PASSAGE_CHARS:
+                yield page, " ".join(buf)
+                buf, size = [], 0
+        if buf:
+            yield page, " ".join(buf)
+
+def text_index(txt_path: str):
+    """(passages, BM25 index) of a text cache file: [(page, text)], indexed by passage position."""
+    st = os.stat(txt_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _text_lock:
+        cached = _text_indexes.get(txt_path)
+        if cached and cached[0] == stamp:
+            return cached[1], cached[2]
+        with open(txt_path, "r", encoding="utf-8", errors="ignore") as f:
+            passages = list(_passages(f.read()))
+        index = BM25Index.build((str(i), tokenize(text)) for i, (_, text) in enumerate(passages))
+        _text_indexes[txt_path] = (stamp, passages, index)
+        return passages, index
+
+def search_passages(txt_path: str, query: str, k: int) -> List[Dict[str, Any]]:
+    """BM25 top-k passages of a text cache file as {text, source, page, score}, best first."""
+    passages, index = text_index(txt_path)
+    results = []
+    for pid, score in index.top(query, k):
+        page, text = passages[int(pid)]
+        results.append({"text": text, "source": "pdf", "page": page, "score": round(score, 3)})
+    return results
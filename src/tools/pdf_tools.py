@@ -1,9 +1,115 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pypdf
 from pypdf import PdfReader
 
-def load_pdf_text(path: str) -> str:
+from src.utils.checkpoint import atomic_write
+
+# Bump when the text layout produced by load_pdf_text changes; old cache entries
+# then simply stop matching and age out through eviction.
+EXTRACTOR_VERSION = f"1-pypdf{pypdf.__version__}"
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "src/data/cache/pdf-text")
+PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "512"))
+
+# PDFs with fewer pages than this are extracted inline; the pool start-up
+# (spawning workers + re-opening the PDF in each) costs more than it saves.
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+
+def _page_block(page_no: int, txt: str) -> str:
+    return f"[p.{page_no}]\n{txt}"
+
+def iter_pdf_pages(path: str, start: int = 1, stop: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """Yield (page_no, text) one page at a time. Page numbers are 1-based; stop is inclusive."""
     reader = PdfReader(path)
-    pages = []
-    for i, p in enumerate(reader.pages, start=1):
-        txt = p.extract_text() or ""
-        pages.append(f"[p.{i}]\n{txt}")
-    return "\n\n".join(pages)
+    last = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for i in range(start, last + 1):
+        yield i, reader.pages[i - 1].extract_text() or ""
+
+def _extract_range(args: Tuple[str, int, int]) -> List[Tuple[int, str]]:
+    path, start, stop = args
+    return list(iter_pdf_pages(path, start, stop))
+
+def iter_pdf_pages_parallel(path: str, workers: Optional[int] = None,
+                            min_pages: int = PARALLEL_MIN_PAGES) -> Iterator[Tuple[int, str]]:
+    """Like iter_pdf_pages, but spreads page ranges over a process pool. Order is preserved."""
+    n_pages = len(PdfReader(path).pages)
+    workers = workers or os.cpu_count() or 1
+    if n_pages < max(min_pages, 2) or workers < 2:
+        yield from iter_pdf_pages(path)
+        return
+
+    # a few ranges per worker keeps the pool busy when some pages are heavier than others
+    span = max(1, -(-n_pages // (workers * 4)))
+    ranges = [(path, s, min(s + span - 1, n_pages)) for s in range(1, n_pages + 1, span)]
+    # spawn, not fork: this runs from batch and worker threads, and forking a threaded
+    # process can leave a lock held forever in the child
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        for chunk in pool.map(_extract_range, ranges):
+            yield from chunk
+
+def load_pdf_text(path: str, parallel: Optional[bool] = None, workers: Optional[int] = None) -> str:
+    """Extract the whole PDF as one string with [p.N] markers.
+
+    parallel=None reads PDF_PARALLEL (default on); the page-count threshold still applies.
+    """
+    if parallel is None:
+        parallel = os.getenv("PDF_PARALLEL", "1") not in ("0", "false", "no")
+    pages = iter_pdf_pages_parallel(path, workers=workers) if parallel else iter_pdf_pages(path)
+    return "\n\n".join(_page_block(i, txt) for i, txt in pages)
+
+# ---------------- content-addressed text cache ----------------
+def file_sha256(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _cache_key(pdf_hash: str) -> str:
+    return hashlib.sha256(f"{pdf_hash}:{EXTRACTOR_VERSION}".encode("utf-8")).hexdigest()
+
+def _evict(cache_dir: Path, max_bytes: int, keep: Path) -> None:
+    """Drop least-recently-used entries (by mtime) until the cache fits in max_bytes."""
+    entries = []
+    for p in cache_dir.glob("*.txt"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        if p == keep:
+            continue
+        try:
+            p.unlink()
+            total -= size
+        except FileNotFoundError:
+            pass
+
+def cached_pdf_text(path: str, cache_dir: str = PDF_CACHE_DIR,
+                    max_mb: float = PDF_CACHE_MAX_MB) -> str:
+    """Return the path of a TXT cache entry for this PDF, extracting only on a miss.
+
+    Entries are keyed by the PDF's sha256 and EXTRACTOR_VERSION and are never
+    rewritten in place, so concurrent runs on different PDFs don't collide.
+    """
+    cdir = Path(cache_dir)
+    cdir.mkdir(parents=True, exist_ok=True)
+    entry = cdir / f"{_cache_key(file_sha256(path))}.txt"
+    if entry.exists():
+        os.utime(entry)  # mark as recently used
+        return str(entry)
+
+    atomic_write(entry, load_pdf_text(path).encode("utf-8", errors="ignore"))
+    _evict(cdir, int(max_mb * 1024 * 1024), keep=entry)
+    return str(entry)
@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("RAG_QUERY_CACHE_TTL", "3600"))
+# Optional on-disk copy so re-runs on the same PDF start warm; keys include the
+# collection version, so entries can never outlive the content they describe.
+QUERY_CACHE_PATH = os.getenv("RAG_QUERY_CACHE_PATH", "")
+
+_SPACE = re.compile(r"\s+")
+
+def normalize_query(q: str) -> str:
+    return _SPACE.sub(" ", (q or "").lower()).strip(" \t\n?.!,;:\"'")
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache of retrieval results, optionally backed by SQLite."""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL,
+                 path: Optional[str] = QUERY_CACHE_PATH or None):
+        self.maxsize, self.ttl = maxsize, ttl
+        self.hits = self.misses = 0
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("CREATE TABLE IF NOT EXISTS q (key TEXT PRIMARY KEY, ts REAL, value TEXT)")
+
+    @staticmethod
+    def key(collection: str, version: str, query: str, k: int) -> str:
+        return json.dumps([collection, version, normalize_query(query), k])
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None and self._db is not None:
+                row = self._db.execute("SELECT ts, value FROM q WHERE key=?", (key,)).fetchone()
+                if row:
+                    hit = (row[0], json.loads(row[1]))
+                    self._data[key] = hit
+            if hit is not None and now - hit[0] <= self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return hit[1]
+            if hit is not None:
+                self._data.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO q VALUES (?, ?, ?)", (key, now, json.dumps(value)))
+                self._db.execute("DELETE FROM q WHERE ts < ?", (now - self.ttl,))
+
+    def invalidate(self, collection: str) -> None:
+        """Drop in-memory entries for a collection (stale versions would miss anyway)."""
+        prefix = json.dumps([collection])[:-1] + ","
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
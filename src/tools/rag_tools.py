@@ -1,92 +1,545 @@
+import threading
+
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 
 _client_cache = {}
+_client_lock = threading.Lock()
 
 def _get_client(persist_dir: str):
     key = persist_dir
-    if key not in _client_cache:
-        _client_cache[key] = chromadb.PersistentClient(
-            path=persist_dir,
-            settings=Settings(allow_reset=True)
-        )
-    return _client_cache[key]
+    client = _client_cache.get(key)
+    if client is None:
+        with _client_lock:
+            if key not in _client_cache:
+                _client_cache[key] = chromadb.PersistentClient(
+                    path=persist_dir,
+                    settings=Settings(allow_reset=True)
+                )
+            client = _client_cache[key]
+    return client
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib, os, json, logging, time
 
-from typing import List
-import hashlib, os
+from src.tools.bm25 import BM25Index, rrf_fuse, tokenize
+from src.tools.chunking import iter_pages_from_text, iter_token_chunks
+from src.tools.embed_cache import CachedEmbeddingFunction
+from src.tools.query_cache import QueryCache
+from src.tools.run_context import RunContext, current
+from src.tools.snippets import RAG_TOKEN_BUDGET, format_compact, pack_snippets
+from src.tools.tokens import count_tokens
+from src.utils import trace
+from src.utils.checkpoint import atomic_write
 
 def _doc_id(s: str) -> str:
     return hashlib.md5(s.encode("utf-8")).hexdigest()
 
-def build_store(text: str, collection_name="biolit", persist_dir="src/data/vectorstore"):
+# ---------------- per-collection manifest ----------------
+# {chunk_id: metadata} for everything currently in the collection. Chunk ids are
+# content hashes, so comparing id sets is enough to find new and vanished chunks.
+def _manifest_path(collection_name: str, persist_dir: str) -> str:
+    return os.path.join(persist_dir, "manifests", f"{collection_name}.json")
+
+def _load_manifest(col, collection_name: str, persist_dir: str) -> Dict[str, Dict]:
+    path = _manifest_path(collection_name, persist_dir)
+    manifest = None
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f).get("chunks")
+        except (OSError, ValueError):
+            manifest = None
+    # Missing, unreadable or out of sync with the store (e.g. vectorstore wiped
+    # by hand): rebuild it from what Chroma actually holds.
+    if manifest is None or len(manifest) != col.count():
+        got = col.get(include=["metadatas"])
+        manifest = {cid: (md or {}) for cid, md in zip(got.get("ids") or [], got.get("metadatas") or [])}
+    return manifest
+
+def _save_manifest(manifest: Dict[str, Dict], collection_name: str, persist_dir: str) -> str:
+    """Write the manifest and return the collection version (a hash of its chunk ids and metadata)."""
+    path = _manifest_path(collection_name, persist_dir)
+    blob = json.dumps(manifest, sort_keys=True, ensure_ascii=False)
+    version = hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+    atomic_write(path, json.dumps({"version": version, "chunks": manifest}))
+    return version
+
+# ---------------- collection versions + query cache ----------------
+# ns -> (manifest mtime_ns, version). The manifest on disk is the source of truth: a
+# rebuild by another process (CLI vs src.worker) shows up as a new mtime.
+_versions: Dict[str, Tuple[int, str]] = {}
+_query_cache = QueryCache()
+
+def _cache_ns(collection_name: str, persist_dir: str) -> str:
+    return f"{os.path.abspath(persist_dir)}::{collection_name}"
+
+def _set_version(ns: str, mtime: int, version: str) -> None:
+    old = _versions.get(ns)
+    _versions[ns] = (mtime, version)
+    if old is not None and old[1] != version:
+        _query_cache.invalidate(ns)
+
+def collection_version(collection_name: str, persist_dir: str) -> str:
+    """Content version of a collection; changes whenever build_store (in any process) changes its chunks or their metadata."""
+    ns = _cache_ns(collection_name, persist_dir)
+    path = _manifest_path(collection_name, persist_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return ""  # unknown: nothing is cached under it
+    cached = _versions.get(ns)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            version = json.load(f).get("version") or ""
+    except (OSError, ValueError):
+        return ""
+    _set_version(ns, mtime, version)
+    return version
+
+# ---------------- lexical (BM25) index ----------------
+RAG_MODE = os.getenv("RAG_MODE", "hybrid")  # "hybrid" (BM25 + vector, RRF) or "vector"
+_bm25: Dict[str, BM25Index] = {}
+
+def _bm25_path(collection_name: str, persist_dir: str) -> str:
+    return os.path.join(persist_dir, "bm25", f"{collection_name}.npz")
+
+def _bm25_index(collection_name: str, persist_dir: str):
+    """The collection's BM25 index if it matches the current collection version, else None."""
+    ns = _cache_ns(collection_name, persist_dir)
+    version = collection_version(collection_name, persist_dir)
+    index = _bm25.get(ns)
+    if index is None or index.version != version:
+        index = BM25Index.load(_bm25_path(collection_name, persist_dir))
+        if index is None or index.version != version:
+            return None
+        _bm25[ns] = index
+    return index
+
+def query_cache_stats() -> Dict[str, int]:
+    return {"hits": _query_cache.hits, "misses": _query_cache.misses}
+
+# ---------------- embedding ----------------
+RAG_BATCH_SIZE = int(os.getenv("RAG_BATCH_SIZE", "128"))
+RAG_EMBED_WORKERS = int(os.getenv("RAG_EMBED_WORKERS", "2"))
+
+_ef = None
+
+def _embedding_function():
+    """The embedding function every collection is opened with (so we can embed ahead of upsert).
+
+    Wrapped in the on-disk embedding cache unless EMBED_CACHE=0, so boilerplate shared
+    across PDFs and repeated queries are embedded once per model.
+    """
+    global _ef
+    if _ef is None:
+        ef = embedding_functions.DefaultEmbeddingFunction()
+        if os.getenv("EMBED_CACHE", "1") not in ("0", "false", "no"):
+            ef = CachedEmbeddingFunction(ef)
+        _ef = ef
+    return _ef
+
+def set_embedding_function(ef) -> None:
+    """Swap the process-wide embedding function (benchmarks, offline runs); None restores the default.
+
+    Collections embedded with a different function should be rebuilt, since their vectors won't compare.
+    """
+    global _ef
+    _ef = ef
+
+def embedding_cache_stats() -> Dict[str, float]:
+    """Hit/miss counters of the embedding cache for this process ({} if disabled)."""
+    return _ef.cache.stats() if isinstance(_ef, CachedEmbeddingFunction) else {}
+
+# Process-level registry of opened collection handles, plus the set of collections
+# known to hold chunks (set by build_store), so the search hot path is a bare query.
+_collections: Dict[str, object] = {}
+_non_empty: set = set()
+_collections_lock = threading.Lock()
+# One build_store at a time per collection: concurrent builds would diff against the
+# same old manifest and race on the upserts/deletes and the manifest write.
+_build_locks: Dict[str, threading.Lock] = {}
+
+def _build_lock(ns: str) -> threading.Lock:
+    with _collections_lock:
+        return _build_locks.setdefault(ns, threading.Lock())
+
+def _collection(persist_dir: str, collection_name: str):
+    # Documents and queries are always embedded by _embedding_function() and passed in
+    # explicitly, so the collection's own (persisted) embedding function is never invoked.
+    ns = _cache_ns(collection_name, persist_dir)
+    col = _collections.get(ns)
+    if col is None:
+        with _collections_lock:
+            if ns not in _collections:
+                _collections[ns] = _get_client(persist_dir).get_or_create_collection(collection_name)
+            col = _collections[ns]
+    return col
+
+def _embed_queries(queries: List[str]):
+    return _embedding_function()(list(queries))
+
+def _batches(items, size: int):
+    buf = []
+    for it in items:
+        buf.append(it)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+def _upsert_pipelined(col, added, batch_size: int, workers: int, verbose: bool = False) -> int:
+    """Embed batch N+1.. on a thread pool while batch N is being upserted. Returns chunks written."""
+    ef = _embedding_function()
+    written, n_batches, pending = 0, 0, deque()
+
+    def embed(batch):
+        t0 = time.perf_counter()
+        return batch, ef([doc for _, doc, _ in batch]), time.perf_counter() - t0
+
+    def drain_one():
+        nonlocal written, n_batches
+        batch, embs, t_embed = pending.popleft().result()
+        t0 = time.perf_counter()
+        col.upsert(ids=[cid for cid, _, _ in batch], embeddings=embs,
+                   documents=[doc for _, doc, _ in batch], metadatas=[md for _, _, md in batch])
+        t_upsert = time.perf_counter() - t0
+        written += len(batch)
+        n_batches += 1
+        if verbose:
+            rate = len(batch) / max(t_embed + t_upsert, 1e-9)
+            print(f"   batch {n_batches}: {len(batch)} chunks, "
+                  f"embed {t_embed:.2f}s, upsert {t_upsert:.2f}s ({rate:.1f} chunks/s)")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in _batches(added, batch_size):
+            pending.append(pool.submit(embed, batch))
+            # keep at most `workers` batches in flight so memory stays bounded
+            while len(pending) > max(1, workers):
+                drain_one()
+        while pending:
+            drain_one()
+    return written
+
+@trace.traced("build_store")
+def build_store(text: str, collection_name="biolit", persist_dir="src/data/vectorstore",
+                max_tokens: int = None, overlap: int = None,
+                batch_size: int = None, workers: int = None, verbose: bool = False):
+    """Sync the collection with `text`: embed only new chunks, drop vanished ones.
+
+    Re-running an unchanged document costs no embedding calls; chunks whose text is
+    unchanged but whose position moved only get a metadata update. New chunks are
+    embedded and upserted in batches of RAG_BATCH_SIZE on RAG_EMBED_WORKERS threads.
+    """
+    with _build_lock(_cache_ns(collection_name, persist_dir)):
+        return _build_store(text, collection_name, persist_dir, max_tokens, overlap,
+                            batch_size, workers, verbose)
+
+def _build_store(text: str, collection_name: str, persist_dir: str, max_tokens, overlap,
+                 batch_size, workers, verbose):
     os.makedirs(persist_dir, exist_ok=True)
     client = _get_client(persist_dir)
-    col = client.get_or_create_collection(collection_name)
-    chunks, size = [], 1200
-    for i in range(0, len(text), size):
-        chunk = text[i:i+size]
-        chunks.append(chunk)
-    if chunks:
-        ids = [_doc_id(c) for c in chunks]
-        col.upsert(ids=ids, documents=chunks, metadatas=[{"source":"pdf","chunk": i} for i in range(len(chunks))])
+    col = _collection(persist_dir, collection_name)
+    old = _load_manifest(col, collection_name, persist_dir)
+    batch_size = batch_size or RAG_BATCH_SIZE
+    workers = workers or RAG_EMBED_WORKERS
+    try:
+        batch_size = min(batch_size, client.get_max_batch_size())
+    except Exception:
+        pass
+
+    new: Dict[str, Dict] = {}
+    lexical: List = []  # (chunk_id, tokens) for the BM25 index
+
+    def added():
+        chunks = iter_token_chunks(
+            iter_pages_from_text(text),
+            **{k: v for k, v in (("max_tokens", max_tokens), ("overlap", overlap)) if v is not None},
+        )
+        for doc, md in chunks:
+            cid = _doc_id(doc)
+            if cid in new:  # identical chunk text seen earlier in this document
+                continue
+            new[cid] = md
+            lexical.append((cid, tokenize(doc)))
+            if cid not in old:
+                yield cid, doc, md
+
+    t0 = time.perf_counter()
+    n_added = _upsert_pipelined(col, added(), batch_size, workers, verbose=verbose)
+
+    gone = [cid for cid in old if cid not in new]
+    moved = [cid for cid, md in new.items() if cid in old and old[cid] != md]
+    for batch in _batches(gone, batch_size):
+        col.delete(ids=batch)
+    for batch in _batches(moved, batch_size):
+        col.update(ids=batch, metadatas=[new[cid] for cid in batch])
+    version = _save_manifest(new, collection_name, persist_dir)
+    ns = _cache_ns(collection_name, persist_dir)
+    _set_version(ns, os.stat(_manifest_path(collection_name, persist_dir)).st_mtime_ns, version)
+    if new:
+        _non_empty.add(ns)
+    else:
+        _non_empty.discard(ns)
+    index = _bm25_index(collection_name, persist_dir)
+    if index is None or index.version != version:
+        index = BM25Index.build(lexical, version=version)
+        index.save(_bm25_path(collection_name, persist_dir))
+        _bm25[ns] = index
+
+    if verbose:
+        dt = time.perf_counter() - t0
+        print(f"🧱 {collection_name}: {len(new)} chunks ({n_added} embedded, {len(gone)} removed, "
+              f"{len(moved)} re-labelled) in {dt:.2f}s")
     return col
 
 def retrieve(query: str, k=5, collection_name="biolit", persist_dir="src/data/vectorstore") -> List[str]:
-    client = _get_client(persist_dir)
-    col = client.get_or_create_collection(collection_name)
-    res = col.query(query_texts=[query], n_results=k)
-    return res.get("documents", [[]])[0] if res else []
+    """Top-k chunk texts for `query`, ranked like pdf_rag_search (RAG_MODE, query cache)."""
+    return _search_many([query], k, collection_name, persist_dir)[0]["documents"]
+
 # --- CrewAI tool wrapper ------------------------------------------------------
-import os, json
 from crewai.tools import tool
 
-@tool("pdf_rag_search")
-def pdf_rag_search(query: str) -> str:
-    """
-    Query the Chroma vector store built from the current PDF text cache.
-    Returns JSON: {"snippets":[{text, source, chunk, distance}]}
-    """
-    persist_dir = os.getenv("VECTORSTORE_DIR", "src/data/vectorstore")
-    collection_name = os.getenv("VECTORSTORE_COLLECTION", "biolit")
-    try:
-        k = int(os.getenv("RAG_TOP_K", "5"))
-    except ValueError:
-        k = 5
-
-    # Lazily build the store from the TXT cache if empty
-    client = _get_client(persist_dir)
-    col = client.get_or_create_collection(collection_name)
-    need_build = False
+def _ensure_built(col, ns: str, collection_name: str, persist_dir: str, text_cache: Optional[str]) -> None:
+    if ns in _non_empty:
+        return
+    # Lazily build the store from the TXT cache if empty (checked once per process)
     try:
         need_build = (col.count() == 0)
     except Exception:
         need_build = True
 
     if need_build:
-        txt_path = os.getenv("PDF_TXT_CACHE", "src/data/input/current.txt")
-        if os.path.exists(txt_path):
-            text = open(txt_path, "r", encoding="utf-8", errors="ignore").read()
+        if text_cache and os.path.exists(text_cache):
+            text = open(text_cache, "r", encoding="utf-8", errors="ignore").read()
             build_store(text, collection_name=collection_name, persist_dir=persist_dir)
-            col = client.get_or_create_collection(collection_name)
+    else:
+        _non_empty.add(ns)
+
+def _search_many(queries: List[str], k: int, collection_name: str, persist_dir: str,
+                 mode: str = None, text_cache: Optional[str] = None) -> List[Dict[str, list]]:
+    """Per-query {ids, documents, metadatas, distances, scores, embeddings}, best first.
 
+    Cache misses share a single col.query call. In hybrid mode the vector ranking is
+    fused with the BM25 ranking by reciprocal rank fusion; `scores` holds the fused
+    score (vector mode: the RRF score of the vector rank alone) and `distances` the
+    vector distance, or None for chunks only the lexical side found. `embeddings` are
+    the stored chunk vectors (for MMR packing); they are not kept in the query cache.
+    """
+    ns = _cache_ns(collection_name, persist_dir)
+    mode = mode or RAG_MODE
+    version = collection_version(collection_name, persist_dir)
+    results: List[Dict[str, list]] = [None] * len(queries)
+    if version:
+        for i, q in enumerate(queries):
+            results[i] = _query_cache.get(_query_cache.key(ns, f"{version}:{mode}", q, k))
+
+    todo = [i for i, r in enumerate(results) if r is None]
+    col = _collection(persist_dir, collection_name)
+    if not todo:
+        return _with_embeddings(col, results)
+
+    _ensure_built(col, ns, collection_name, persist_dir, text_cache)
+    index = _bm25_index(collection_name, persist_dir) if mode == "hybrid" else None
+    fetch = k * 2 if index is not None else k
     res = col.query(
-        query_texts=[query],
-        n_results=k,
-        include=["documents", "metadatas", "distances"]
+        query_embeddings=_embed_queries([queries[i] for i in todo]),
+        n_results=fetch,
+        include=["documents", "metadatas", "distances", "embeddings"]
     )
-    docs  = (res.get("documents") or [[]])[0]
-    metas = (res.get("metadatas") or [[]])[0]
-    dists = (res.get("distances") or [[]])[0]
+
+    def field(name, j):
+        v = res.get(name)  # embeddings may come back as numpy arrays: no truthiness tests
+        return list(v[j]) if v is not None and j < len(v) and v[j] is not None else []
+
+    found: Dict[str, tuple] = {}  # chunk id -> (document, metadata, embedding)
+    rankings = []
+    for j, i in enumerate(todo):
+        ids, docs, metas, dists = field("ids", j), field("documents", j), field("metadatas", j), field("distances", j)
+        for cid, doc, md, emb in zip(ids, docs, metas, field("embeddings", j)):
+            if doc is not None:  # None: deleted by a rebuild this process's index hasn't seen
+                found[cid] = (doc, md, emb)
+        vec = dict(zip(ids, dists))
+        if index is not None:
+            fused = rrf_fuse([ids, [cid for cid, _ in index.top(queries[i], fetch)]])[:k]
+        else:
+            fused = rrf_fuse([ids])[:k]
+        rankings.append((i, fused, vec))
+
+    missing = list({cid for _, fused, _ in rankings for cid, _ in fused if cid not in found})
+    if missing:
+        got = col.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        for cid, doc, md, emb in zip(_list(got, "ids"), _list(got, "documents"), _list(got, "metadatas"),
+                                     _list(got, "embeddings")):
+            found[cid] = (doc, md, emb)
+
+    version = collection_version(collection_name, persist_dir)
+    for i, fused, vec in rankings:
+        fused = [(cid, score) for cid, score in fused if cid in found]
+        results[i] = {
+            "ids": [cid for cid, _ in fused],
+            "documents": [found[cid][0] for cid, _ in fused],
+            "metadatas": [found[cid][1] for cid, _ in fused],
+            "distances": [vec.get(cid) for cid, _ in fused],
+            "scores": [score for _, score in fused],
+        }
+        if version:
+            _query_cache.put(_query_cache.key(ns, f"{version}:{mode}", queries[i], k), results[i])
+        results[i] = dict(results[i], embeddings=[found[cid][2] for cid, _ in fused])
+    return _with_embeddings(col, results)
+
+def _list(got, field: str) -> list:
+    v = got.get(field)
+    return list(v) if v is not None else []  # chroma may hand back numpy arrays
+
+def _with_embeddings(col, results: List[Dict[str, list]]) -> List[Dict[str, list]]:
+    """Fill in stored vectors for query-cache hits with one col.get (nothing is re-embedded)."""
+    need = list({cid for r in results if "embeddings" not in r for cid in r["ids"]})
+    if not need:
+        return results
+    got = col.get(ids=need, include=["embeddings"])
+    vectors = dict(zip(_list(got, "ids"), _list(got, "embeddings")))
+    return [r if "embeddings" in r else dict(r, embeddings=[vectors.get(cid) for cid in r["ids"]])
+            for r in results]
+
+def _snippet(text: str, md, dist, score=None) -> Dict:
+    md = md if isinstance(md, dict) else {}
+    return {
+        "text": text,
+        "source": md.get("source", "pdf"),
+        "chunk": md.get("chunk"),
+        "page_start": md.get("page_start"),
+        "page_end": md.get("page_end"),
+        "distance": dist,
+        "score": score,
+    }
+
+def _coerce_queries(queries) -> List[str]:
+    if isinstance(queries, str):
+        try:
+            parsed = json.loads(queries)
+            queries = parsed if isinstance(parsed, list) else [queries]
+        except ValueError:
+            queries = queries.splitlines()
+    return [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+
+# ---------------- tool output ----------------
+# "compact" (default): packed '[n] p.X-Y: text' blocks; "json": packed snippets as JSON;
+# "raw": every retrieved chunk, unpacked (the pre-packing behaviour).
+RAG_OUTPUT = os.getenv("RAG_OUTPUT", "compact")
+_packing = {"calls": 0, "raw_tokens": 0, "tokens": 0}
+_packing_lock = threading.Lock()  # tools run concurrently (DAG pool, arun_dag threads)
+_log = logging.getLogger(__name__)
+
+def _render(snippets: List[Dict], embeddings: Optional[List] = None) -> str:
+    """Tool output for snippets; `embeddings` are their stored chunk vectors (None: MMR by relevance only)."""
+    raw = json.dumps({"snippets": snippets}, ensure_ascii=False)
+    if RAG_OUTPUT == "raw" or not snippets:
+        return raw
+    if embeddings is not None and any(e is None for e in embeddings):
+        embeddings = None
+    packed = pack_snippets(snippets, embeddings, budget=RAG_TOKEN_BUDGET)
+    if RAG_OUTPUT == "json":
+        keep = ("text", "page_start", "page_end")
+        out = json.dumps({"snippets": [{f: s.get(f) for f in keep} for s in packed]},
+                         ensure_ascii=False, separators=(",", ":"))
+    else:
+        out = format_compact(packed)
+    raw_t, out_t = count_tokens(raw), count_tokens(out)
+    with _packing_lock:
+        _packing["calls"] += 1; _packing["raw_tokens"] += raw_t; _packing["tokens"] += out_t
+    _log.info("rag output: %d -> %d tokens (%d saved, %d/%d snippets kept)",
+              raw_t, out_t, raw_t - out_t, len(packed), len(snippets))
+    return out
+
+def packing_stats() -> Dict[str, int]:
+    with _packing_lock:
+        return dict(_packing, saved=_packing["raw_tokens"] - _packing["tokens"])
+
+def _pdf_rag_search(query: str, ctx: RunContext) -> str:
+    with trace.span("pdf_rag_search"):
+        trace.add(tool_calls=1)
+        return _pdf_rag_search_impl(query, ctx)
+
+def _pdf_rag_search_impl(query: str, ctx: RunContext) -> str:
+    hit = _search_many([query], ctx.top_k, ctx.collection, ctx.persist_dir, text_cache=ctx.text_cache)[0]
+    docs, metas, dists = hit["documents"], hit["metadatas"], hit["distances"]
+    scores = hit.get("scores") or []
+    embeddings = hit.get("embeddings")
 
     snippets = []
     for i, text in enumerate(docs):
-        md = metas[i] if i < len(metas) and isinstance(metas[i], dict) else {}
-        dist = dists[i] if i < len(dists) else None
-        snippets.append({
-            "text": text,
-            "source": md.get("source", "pdf"),
-            "chunk": md.get("chunk"),
-            "distance": dist
-        })
-    return json.dumps({"snippets": snippets}, ensure_ascii=False)
+        snippets.append(_snippet(
+            text,
+            metas[i] if i < len(metas) else None,
+            dists[i] if i < len(dists) else None,
+            scores[i] if i < len(scores) else None,
+        ))
+    return _render(snippets, embeddings)
+
+def _pdf_rag_multi_search(queries, ctx: RunContext) -> str:
+    with trace.span("pdf_rag_multi_search"):
+        trace.add(tool_calls=1)
+        return _pdf_rag_multi_search_impl(queries, ctx)
+
+def _pdf_rag_multi_search_impl(queries, ctx: RunContext) -> str:
+    queries = _coerce_queries(queries)
+    if not queries:
+        return _render([])
+    merged: Dict[str, Dict] = {}
+    vectors: Dict[str, Any] = {}
+    hits = _search_many(queries, ctx.top_k, ctx.collection, ctx.persist_dir, text_cache=ctx.text_cache)
+    for qi, hit in enumerate(hits):
+        docs, metas, dists = hit["documents"], hit["metadatas"], hit["distances"]
+        scores = hit.get("scores") or [0.0] * len(docs)
+        for i, text in enumerate(docs):
+            dist = dists[i] if i < len(dists) else None
+            score = scores[i] if i < len(scores) else 0.0
+            key = _doc_id(text)
+            if key not in merged:
+                merged[key] = dict(_snippet(text, metas[i] if i < len(metas) else None, dist, score), queries=[])
+                vectors[key] = (hit.get("embeddings") or [None] * len(docs))[i]
+            snip = merged[key]
+            snip["queries"].append(qi)
+            if dist is not None and (snip["distance"] is None or dist < snip["distance"]):
+                snip["distance"] = dist
+            snip["score"] = max(snip["score"] or 0.0, score)
+
+    ranked = sorted(merged, key=lambda key: (-merged[key]["score"], -len(merged[key]["queries"])))
+    return _render([merged[key] for key in ranked], [vectors[key] for key in ranked])
+
+def make_rag_tools(ctx: Optional[RunContext] = None) -> Dict[str, Any]:
+    """Tool instances bound to one run's context; ctx=None follows the active context/env per call."""
+    resolve = (lambda: ctx) if ctx is not None else current
+
+    @tool("pdf_rag_search")
+    def pdf_rag_search(query: str) -> str:
+        """
+        Query the Chroma vector store built from the current PDF text cache.
+        Returns the most relevant, de-duplicated passages within a token budget, one block
+        per passage: "[n] p.X-Y: text" (inline [p.N] markers give the page for citations).
+        """
+        return _pdf_rag_search(query, resolve())
+
+    @tool("pdf_rag_multi_search")
+    def pdf_rag_multi_search(queries: List[str]) -> str:
+        """
+        Run several sub-queries against the PDF vector store in one call.
+        Pass a list of short, focused queries (e.g. one per claim, method or metric).
+        Passages returned by more than one sub-query appear once, best first, packed within
+        a token budget as "[n] p.X-Y: text" blocks.
+        """
+        return _pdf_rag_multi_search(queries, resolve())
+
+    return {"pdf_rag_search": pdf_rag_search, "pdf_rag_multi_search": pdf_rag_multi_search}
 
+# Process-wide instances: follow use_context(...) when active, else the env vars.
+_default_tools = make_rag_tools()
+pdf_rag_search = _default_tools["pdf_rag_search"]
+pdf_rag_multi_search = _default_tools["pdf_rag_multi_search"]
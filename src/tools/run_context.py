@@ -0,0 +1,44 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Iterator, Optional
+
+@dataclass(frozen=True)
+class RunContext:
+    """Per-run settings for the RAG tools (which collection, how many hits, which text cache)."""
+    collection: str = "biolit"
+    persist_dir: str = "src/data/vectorstore"
+    top_k: int = 5
+    text_cache: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "RunContext":
+        """Settings for ad-hoc tool use outside run_pipeline (the old env-var interface)."""
+        try:
+            top_k = int(os.getenv("RAG_TOP_K", "5"))
+        except ValueError:
+            top_k = 5
+        return cls(
+            collection=os.getenv("VECTORSTORE_COLLECTION", "biolit"),
+            persist_dir=os.getenv("VECTORSTORE_DIR", "src/data/vectorstore"),
+            top_k=top_k,
+            text_cache=os.getenv("PDF_TXT_CACHE", "src/data/input/current.txt"),
+        )
+
+    def with_(self, **changes) -> "RunContext":
+        return replace(self, **changes)
+
+_current: ContextVar[Optional[RunContext]] = ContextVar("rag_run_context", default=None)
+
+def current() -> RunContext:
+    """The active run's context, or one read from the environment when none is active."""
+    return _current.get() or RunContext.from_env()
+
+@contextmanager
+def use_context(ctx: RunContext) -> Iterator[RunContext]:
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
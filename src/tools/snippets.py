@@ -0,0 +1,89 @@
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.tools.tokens import count_tokens
+
+RAG_TOKEN_BUDGET = int(os.getenv("RAG_TOKEN_BUDGET", "1200"))
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+NEAR_DUPLICATE = 0.95  # cosine above which a candidate adds nothing new
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\s+(?=\[p\.\d+\])")
+_MARKER = re.compile(r"^\[p\.\d+\]\s*")
+
+def _relevance(snippets: Sequence[Dict]) -> np.ndarray:
+    """Map fused scores (higher=better) or distances (lower=better) onto [0, 1]."""
+    if all(s.get("score") is not None for s in snippets):
+        rel = np.asarray([s["score"] for s in snippets], dtype=np.float32)
+    else:
+        d = np.asarray([s["distance"] if s.get("distance") is not None else np.nan for s in snippets],
+                       dtype=np.float32)
+        d = np.where(np.isnan(d), np.nanmax(d) if np.isfinite(d).any() else 1.0, d)
+        rel = -d
+    lo, hi = float(rel.min()), float(rel.max())
+    return (rel - lo) / (hi - lo) if hi > lo else np.ones_like(rel)
+
+def mmr_order(snippets: Sequence[Dict], embeddings: Optional[Sequence], lam: float = RAG_MMR_LAMBDA) -> List[int]:
+    """Maximal marginal relevance ordering; near-duplicates of already chosen snippets are dropped."""
+    n = len(snippets)
+    if n == 0:
+        return []
+    rel = _relevance(snippets)
+    if embeddings is None or len(embeddings) != n:
+        return list(np.argsort(-rel, kind="stable"))
+    e = np.asarray(embeddings, dtype=np.float32)
+    e = e / np.maximum(np.linalg.norm(e, axis=1, keepdims=True), 1e-9)
+    sim = e @ e.T
+    chosen: List[int] = []
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    left = np.ones(n, dtype=bool)
+    while left.any():
+        redundancy = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        mmr = np.where(left, lam * rel - (1.0 - lam) * redundancy, -np.inf)
+        i = int(np.argmax(mmr))
+        left[i] = False
+        if max_sim[i] >= NEAR_DUPLICATE:
+            continue
+        chosen.append(i)
+        max_sim = np.maximum(max_sim, sim[i])
+    return chosen
+
+def _fit_sentences(text: str, seen: set, budget: int):
+    """Sentences of `text` not already emitted, cut at the last whole sentence within budget."""
+    out, keys, used = [], [], 0
+    for sent in _SENTENCE.split(text):
+        sent = sent.strip()
+        key = _MARKER.sub("", sent)  # the same sentence may carry a page marker in one chunk only
+        if not key or key in seen:
+            continue
+        t = count_tokens(sent) + 1
+        if used + t > budget:
+            break
+        out.append(sent); keys.append(key)
+        used += t
+    return out, keys, used
+
+def pack_snippets(snippets: Sequence[Dict], embeddings: Optional[Sequence] = None,
+                  budget: int = RAG_TOKEN_BUDGET, lam: float = RAG_MMR_LAMBDA) -> List[Dict]:
+    """Diversify with MMR, drop sentences already packed, and stop at `budget` tokens."""
+    packed, seen, used = [], set(), 0
+    for i in mmr_order(snippets, embeddings, lam):
+        sents, keys, t = _fit_sentences(snippets[i]["text"], seen, budget - used)
+        if not sents:
+            continue
+        seen.update(keys)
+        used += t
+        packed.append(dict(snippets[i], text=" ".join(sents)))
+    return packed
+
+def _pages(s: Dict) -> str:
+    a, b = s.get("page_start"), s.get("page_end")
+    if a is None:
+        return ""
+    return f"p.{a}" if b in (None, a) else f"p.{a}-{b}"
+
+def format_compact(snippets: Sequence[Dict]) -> str:
+    """One block per snippet: '[n] p.X-Y: text'. Inline [p.N] markers in the text stay as citations."""
+    return "\n\n".join(f"[{n}] {_pages(s)}: {s['text']}" for n, s in enumerate(snippets, start=1))
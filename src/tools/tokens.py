@@ -0,0 +1,31 @@
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+_WORDISH = re.compile(r"\w+|[^\w\s]")
+
+class _ApproxEncoder:
+    """Offline stand-in when tiktoken or its BPE files are unavailable: one token per word/punct."""
+    name = "approx"
+
+    def encode(self, s: str) -> List[str]:
+        return _WORDISH.findall(s)
+
+    def decode(self, toks: List[str]) -> str:
+        return " ".join(toks)
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = TOKEN_ENCODING):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return _ApproxEncoder()
+
+def count_tokens(s: str) -> int:
+    if not s:
+        return 0
+    return len(get_encoder().encode(s))
@@ -0,0 +1,75 @@
+# src/utils/checkpoint.py
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+def fingerprint(*parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """Write via a temp file named by pid + thread id, so concurrent writers never share one."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    if isinstance(data, bytes):
+        tmp.write_bytes(data)
+    else:
+        tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+class RunCheckpoint:
+    """Per-PDF run manifest plus one checkpoint file per completed task.
+
+    Layout: <run_dir>/manifest.json and <run_dir>/tasks/<task_id>.txt. A task's
+    checkpoint is reusable only if its fingerprint (spec, agent, resolved LLM, inputs
+    and the fingerprints of the tasks it depends on) is unchanged.
+    """
+
+    def __init__(self, run_dir: str, inputs: Optional[Dict[str, Any]] = None):
+        self.dir = Path(run_dir)
+        self.path = self.dir / "manifest.json"
+        self._lock = threading.Lock()
+        try:
+            self.manifest = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault("tasks", {})
+        if inputs is not None:
+            self.manifest["inputs"] = inputs
+        self.manifest["started_at"] = _now()
+        self.manifest.pop("finished_at", None)
+
+    def cached(self, task_id: str, fp: str) -> Optional[str]:
+        entry = self.manifest["tasks"].get(task_id) or {}
+        if entry.get("status") != "done" or entry.get("fingerprint") != fp:
+            return None
+        try:
+            return (self.dir / entry["checkpoint"]).read_text(encoding="utf-8")
+        except (OSError, KeyError):
+            return None
+
+    def save(self, task_id: str, fp: str, text: str, artifact: Optional[str] = None) -> None:
+        rel = f"tasks/{task_id}.txt"
+        atomic_write(self.dir / rel, text)
+        with self._lock:
+            self.manifest["tasks"][task_id] = {
+                "status": "done", "fingerprint": fp, "checkpoint": rel,
+                "artifact": artifact, "completed_at": _now(),
+            }
+            self._flush()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.manifest["finished_at"] = _now()
+            self._flush()
+
+    def _flush(self) -> None:
+        atomic_write(self.path, json.dumps(self.manifest, indent=2, ensure_ascii=False))
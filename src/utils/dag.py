@@ -0,0 +1,108 @@
+# src/utils/dag.py
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+def task_graph(specs: Sequence[Dict[str, Any]], task_ids: Sequence[str]) -> Dict[str, List[str]]:
+    """{task_id: [dependency ids]} from `depends_on` / `context` in tasks.yaml.
+
+    If no task declares either key, every task depends on all earlier ones, which is
+    exactly what Process.sequential does. Raises ValueError on unknown ids or cycles.
+    """
+    declared = any("depends_on" in s or "context" in s for s in specs)
+    deps: Dict[str, List[str]] = {}
+    for i, (spec, tid) in enumerate(zip(specs, task_ids)):
+        if not declared:
+            deps[tid] = list(task_ids[:i])
+            continue
+        raw = spec.get("depends_on", spec.get("context")) or []
+        if isinstance(raw, str):
+            raw = [raw]
+        for d in raw:
+            if d not in task_ids:
+                raise ValueError(f"Task '{tid}' depends on unknown task '{d}'.")
+            if d == tid:
+                raise ValueError(f"Task '{tid}' depends on itself.")
+        deps[tid] = list(dict.fromkeys(raw))
+    topo_order(deps)
+    return deps
+
+def topo_order(deps: Dict[str, List[str]]) -> List[str]:
+    """Kahn's algorithm; ties keep declaration order. Raises ValueError naming a cycle."""
+    indeg = {t: len(ds) for t, ds in deps.items()}
+    users: Dict[str, List[str]] = {t: [] for t in deps}
+    for t, ds in deps.items():
+        for d in ds:
+            users[d].append(t)
+    ready = [t for t in deps if indeg[t] == 0]
+    order: List[str] = []
+    while ready:
+        t = ready.pop(0)
+        order.append(t)
+        for u in users[t]:
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                ready.append(u)
+    if len(order) != len(deps):
+        stuck = [t for t in deps if t not in order]
+        raise ValueError(f"Task dependency cycle among: {', '.join(stuck)}")
+    return order
+
+def run_dag(deps: Dict[str, List[str]], run: Callable[[str], Any], max_workers: int = 4,
+            done: Sequence[str] = ()) -> Dict[str, Any]:
+    """Run every task not in `done` as soon as its dependencies have finished.
+
+    At most `max_workers` tasks run at once; the first failure cancels whatever has
+    not started yet and is re-raised. Returns {task_id: run(task_id)}.
+    """
+    finished = set(done)
+    pending = [t for t in topo_order(deps) if t not in finished]
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        while pending or running:
+            for t in [t for t in pending if all(d in finished for d in deps[t])]:
+                if len(running) >= max(1, max_workers):
+                    break
+                pending.remove(t)
+                # carry the caller's contextvars (e.g. the active RunContext) into the worker
+                running[pool.submit(contextvars.copy_context().run, run, t)] = t
+            if not running:
+                raise RuntimeError("Scheduler stalled: tasks waiting on dependencies that never ran.")
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in completed:
+                t = running.pop(fut)
+                try:
+                    results[t] = fut.result()
+                except BaseException:
+                    for f in running:
+                        f.cancel()
+                    raise
+                finished.add(t)
+    return results
+
+async def arun_dag(deps: Dict[str, List[str]], run: Callable[[str], Awaitable[Any]], max_workers: int = 4,
+                   done: Sequence[str] = ()) -> Dict[str, Any]:
+    """asyncio counterpart of run_dag: one coroutine per task, gated on its dependencies.
+
+    A failure (or cancellation of the caller) cancels every task still waiting or running.
+    """
+    sem = asyncio.Semaphore(max(1, max_workers))
+    futs: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def one(t: str) -> Any:
+        await asyncio.gather(*(futs[d] for d in deps[t] if d in futs))
+        async with sem:
+            return await run(t)
+
+    for t in topo_order(deps):
+        if t not in done:
+            futs[t] = asyncio.ensure_future(one(t))
+    try:
+        values = await asyncio.gather(*futs.values())
+    except BaseException:
+        for f in futs.values():
+            f.cancel()
+        raise
+    return dict(zip(futs, values))
@@ -0,0 +1,52 @@
+# src/utils/partial.py
+import threading
+from pathlib import Path
+from typing import IO, Optional
+
+class PartialWriter:
+    """Streams a task's answer into <artifact>.partial while the LLM is still generating.
+
+    Only text after crewai's "Final Answer:" marker is written (earlier turns are the
+    agent's Thought/Action steps), so the file previews the artifact itself. Memory stays
+    flat: just a marker-sized tail is buffered. finish() removes the file once the real
+    artifact has been written atomically.
+    """
+
+    MARKER = "Final Answer:"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._tail = ""
+        self._started = False
+        self._f: Optional[IO[str]] = None
+
+    def reset(self) -> None:
+        """A new LLM call starts: drop what an earlier (e.g. retried) answer streamed."""
+        with self._lock:
+            self._tail, self._started = "", False
+            if self._f is not None:
+                self._f.seek(0)
+                self._f.truncate()
+
+    def write(self, chunk: str) -> None:
+        with self._lock:
+            if not self._started:
+                self._tail += chunk
+                i = self._tail.find(self.MARKER)
+                if i < 0:
+                    self._tail = self._tail[-len(self.MARKER):]  # the marker may straddle chunks
+                    return
+                chunk, self._tail, self._started = self._tail[i + len(self.MARKER):].lstrip(), "", True
+                if self._f is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._f = open(self.path, "w", encoding="utf-8")
+            self._f.write(chunk)
+            self._f.flush()
+
+    def finish(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+            self.path.unlink(missing_ok=True)
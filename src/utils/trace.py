@@ -0,0 +1,148 @@
+# src/utils/trace.py
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.checkpoint import atomic_write
+
+# Stdlib only: src.main imports this before the heavy stack (see scripts/import_budget.py).
+
+COUNTERS = ("tool_calls", "llm_calls", "llm_cache_hits", "prompt_tokens", "completion_tokens",
+            "context_tokens_raw", "context_tokens")  # context: earlier outputs before/after compaction
+
+class Span:
+    """One timed stage. Counters added inside it also roll up into every enclosing span."""
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.tracer, self.name, self.parent, self.attrs = tracer, name, parent, attrs
+        self.id = uuid.uuid4().hex[:8]
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.child: Optional[Span] = None  # stage currently running "inside" a crew kickoff
+        self.start = time.time()
+        self._t0, self._cpu0, self._tcpu0 = time.perf_counter(), time.process_time(), time.thread_time()
+
+    def add(self, **counts: int) -> None:
+        with self.tracer._lock:
+            s = self
+            while s is not None:
+                for k, v in counts.items():
+                    s.counts[k] = s.counts.get(k, 0) + v
+                s = s.parent
+
+    def record(self, error: Optional[BaseException] = None) -> Dict[str, Any]:
+        return {
+            "run": self.tracer.run_id, "span": self.id, "parent": self.parent.id if self.parent else None,
+            "name": self.name, "start": round(self.start, 6),
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(time.process_time() - self._cpu0, 4),          # whole process
+            "thread_cpu_s": round(time.thread_time() - self._tcpu0, 4),   # this thread only
+            **self.counts,
+            "status": "error" if error else "ok",
+            **({"error": f"{type(error).__name__}: {error}"} if error else {}),
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+class Tracer:
+    """Collects finished spans of one run; write() dumps them as JSON lines."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, parent: Optional[Span] = None, **attrs: Any) -> Span:
+        return Span(self, name, parent, attrs)
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        rec = span.record(error)
+        with self._lock:
+            self.records.append(rec)
+
+    def write(self, path: Path) -> str:
+        with self._lock:
+            lines = [json.dumps(r, ensure_ascii=False, default=str) for r in self.records]
+        atomic_write(Path(path), "\n".join(lines) + "\n")
+        return str(path)
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage sums (spans with the same name are added up), in order of first start."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r["start"])
+        for r in records:
+            row = rows.setdefault(r["name"], {"n": 0, "wall_s": 0.0, "cpu_s": 0.0, **dict.fromkeys(COUNTERS, 0)})
+            row["n"] += 1
+            for k in ("wall_s", "cpu_s", *COUNTERS):
+                row[k] += r.get(k, 0)
+        return rows
+
+    def summary(self) -> str:
+        """Per-stage table, see totals()."""
+        rows = self.totals()
+        head = f"{'stage':<24} {'n':>4} {'wall s':>8} {'cpu s':>8} {'tools':>6} {'llm':>5} {'prompt tok':>11} {'compl tok':>10}"
+        lines = [head, "-" * len(head)]
+        for name, r in rows.items():
+            lines.append(f"{name[:24]:<24} {r['n']:>4} {r['wall_s']:>8.2f} {r['cpu_s']:>8.2f} {r['tool_calls']:>6} "
+                         f"{r['llm_calls']:>5} {r['prompt_tokens']:>11} {r['completion_tokens']:>10}")
+        return "\n".join(lines)
+
+_tracer: ContextVar[Optional[Tracer]] = ContextVar("trace_tracer", default=None)
+_active: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+def active_tracer() -> Optional[Tracer]:
+    return _tracer.get()
+
+def current_span() -> Optional[Span]:
+    s = _active.get()
+    while s is not None and s.child is not None:
+        s = s.child
+    return s
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time a stage under the active tracer; a no-op (yields None) when none is active."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield None
+        return
+    s = tracer.start(name, current_span(), **attrs)
+    token = _active.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        tracer.end(s, error=e)
+        raise
+    else:
+        tracer.end(s)
+    finally:
+        _active.reset(token)
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def add(**counts: int) -> None:
+    """Bump counters (see COUNTERS) on the innermost running span, if any."""
+    s = current_span()
+    if s is not None:
+        s.add(**counts)
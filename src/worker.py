@@ -0,0 +1,422 @@
+# src/worker.py
+"""Long-running worker: pays the cold start (crewai import, Chroma client, embedding
+model) once, then runs jobs from a spool directory and/or a small HTTP endpoint.
+
+  python -m src.worker --spool src/data/spool        # drop jobs into <spool>/incoming/*.json
+  python -m src.worker --http 127.0.0.1:8765         # POST /jobs, GET /jobs/<id>, GET /healthz
+
+A job is {"pdf": "<path>", "id": "<optional>", "overrides": {...}}; the pdf path is relative
+to --pdf-dir (default src/data). Overrides may set
+top_k, resume, llm_cache (this job's LLM calls only), max_concurrency, batch_size,
+embed_workers, output_dir (a subdirectory of --output-dir), agents / tasks (alternate
+YAML files under src/), model (forces every agent onto one model, e.g. a local
+OpenAI-compatible stand-in reached through OPENAI_API_BASE) and llm_backend /
+llm_fixture (e.g. "synthetic" for a network-free run, see src/llm/fake.py; fixtures
+live under src/data/). Path overrides that are absolute or climb out with ".." are refused.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import signal
+import socket
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path, PurePath
+from typing import Any, Dict, List, Optional
+
+from src.main import load_yaml, process_pdf
+
+ROOT = Path(__file__).resolve().parent
+
+PIPELINE_OVERRIDES = ("top_k", "resume", "llm_cache", "max_concurrency", "batch_size", "embed_workers")
+PATH_OVERRIDES = ("output_dir", "agents", "tasks", "llm_fixture")  # relative to a fixed base, see run_job
+
+def _confined(base: Path, rel: str) -> Path:
+    """base/rel, refusing anything that resolves outside base (e.g. through a symlink)."""
+    path = (base / rel).resolve()
+    if not path.is_relative_to(base.resolve()):
+        raise ValueError(f"path {rel!r} escapes {base}")
+    return path
+
+def _relative(v: Any) -> bool:
+    return isinstance(v, str) and not PurePath(v).is_absolute() and ".." not in PurePath(v).parts
+
+@dataclass
+class Job:
+    pdf: str
+    overrides: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    spool_file: Optional[Path] = None  # claimed file under <spool>/processing/<worker>
+    status: str = "queued"             # queued | running | ok | error | cancelled
+    result: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_payload(cls, payload: Any, **kw) -> "Job":
+        if not isinstance(payload, dict) or not isinstance(payload.get("pdf"), str):
+            raise ValueError("job must be a JSON object with a 'pdf' path")
+        overrides = payload.get("overrides") or {}
+        if not isinstance(overrides, dict):
+            raise ValueError("'overrides' must be an object")
+        if not _relative(payload["pdf"]):
+            raise ValueError("'pdf' must be a relative path without '..'")
+        for k in PATH_OVERRIDES:
+            v = overrides.get(k)
+            if v is not None and not _relative(v):
+                raise ValueError(f"override '{k}' must be a relative path without '..'")
+        if payload.get("id"):
+            kw["id"] = str(payload["id"])
+        return cls(pdf=payload["pdf"], overrides=overrides, **kw)
+
+    def public(self) -> Dict[str, Any]:
+        return {"id": self.id, "pdf": self.pdf, "status": self.status, "result": self.result}
+
+# ---------------- worker ----------------
+class Worker:
+    """Bounded job queue + `jobs` runner threads sharing one warm process.
+
+    Backpressure: the queue holds at most max_pending jobs; the spool poller stops claiming
+    files and the HTTP endpoint answers 503 while it is full. stop() lets running jobs finish,
+    returns unstarted spool jobs to incoming/ and marks unstarted HTTP jobs cancelled.
+    """
+
+    def __init__(self, jobs: int = 1, max_pending: int = 8, output_dir: Optional[str] = None,
+                 verbose: bool = False, keep: int = 1000, pdf_dir: Optional[str] = None):
+        self.q: "queue.Queue[Job]" = queue.Queue(maxsize=max(1, max_pending))
+        self.n_runners = max(1, jobs)
+        self.output_dir = Path(output_dir) if output_dir else ROOT / "data" / "output"
+        self.pdf_dir = Path(pdf_dir) if pdf_dir else ROOT / "data"
+        self.verbose = verbose
+        self.keep = keep
+        self.stopping = threading.Event()
+        self.jobs: Dict[str, Job] = {}
+        self.running = 0
+        self.outstanding = 0  # accepted and not yet finished/abandoned
+        self._lock = threading.Lock()
+        self._configs: Dict[str, Any] = {}
+        self._threads = []
+        self.spool: Optional["Spool"] = None
+
+    def warm(self) -> float:
+        """Import the heavy stack and open the Chroma client + embedding model once."""
+        t0 = time.perf_counter()
+        # imported only for its side effect: loading crewai, chromadb and litellm now
+        # instead of inside the first job
+        import src.crew  # noqa: F401
+        from src.tools.rag_tools import _embedding_function, _get_client
+        _get_client(os.getenv("VECTORSTORE_DIR", "src/data/vectorstore"))
+        _embedding_function()(["warm-up"])
+        return time.perf_counter() - t0
+
+    def _config(self, path: str):
+        with self._lock:
+            if path not in self._configs:
+                self._configs[path] = load_yaml(Path(path))
+            return self._configs[path]
+
+    def submit(self, job: Job, timeout: Optional[float] = 0) -> bool:
+        """Queue a job; False when the queue is full (after waiting up to timeout) or stopping."""
+        if self.stopping.is_set():
+            return False
+        with self._lock:
+            self.outstanding += 1
+        try:
+            self.q.put(job, timeout=timeout) if timeout else self.q.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.outstanding -= 1
+            return False
+        with self._lock:
+            self.jobs[job.id] = job
+            if len(self.jobs) > self.keep:  # forget the oldest finished jobs
+                for jid in [j for j, v in self.jobs.items() if v.status not in ("queued", "running")]:
+                    if len(self.jobs) <= self.keep:
+                        break
+                    del self.jobs[jid]
+        return True
+
+    def has_room(self) -> bool:
+        return not self.q.full()
+
+    def idle(self) -> bool:
+        return self.outstanding == 0
+
+    def run_job(self, job: Job) -> Dict[str, Any]:
+        o = job.overrides
+        pdf = str(_confined(self.pdf_dir, job.pdf))
+        agents = self._config(str(_confined(ROOT, o.get("agents") or "agents.yaml")))
+        tasks = self._config(str(_confined(ROOT, o.get("tasks") or "tasks.yaml")))
+        forced = {k: o[k] for k in ("model", "llm_backend") if o.get(k)}
+        if o.get("llm_fixture"):
+            forced["llm_fixture"] = str(_confined(ROOT / "data", o["llm_fixture"]))
+        if forced:
+            agents = {name: {**spec, **forced} for name, spec in agents.items()}
+        # llm_cache is scoped to this job's run (run_pipeline), not set process-wide
+        kwargs = {k: o[k] for k in PIPELINE_OVERRIDES if o.get(k) is not None}
+        output_dir = _confined(self.output_dir, o.get("output_dir") or ".")
+        return process_pdf(pdf, agents, tasks, ROOT, output_dir, verbose=self.verbose, **kwargs)
+
+    def _runner(self) -> None:
+        while not (self.stopping.is_set() and self.q.empty()):
+            try:
+                job = self.q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if self.stopping.is_set():
+                self._abandon(job)
+                continue
+            with self._lock:
+                self.running += 1
+            job.status = "running"
+            try:
+                job.result = self.run_job(job)
+                job.status = job.result["status"]
+            except Exception as e:  # bad overrides / config paths
+                job.result = {"pdf": job.pdf, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                job.status = "error"
+            finally:
+                with self._lock:
+                    self.running -= 1
+            print(f"{'✅' if job.status == 'ok' else '❌'} job {job.id}: {job.pdf} "
+                  f"({job.result.get('seconds', 0)}s)", flush=True)
+            if job.spool_file and self.spool:
+                self.spool.finish(job)
+            with self._lock:
+                self.outstanding -= 1
+
+    def _abandon(self, job: Job) -> None:
+        if job.spool_file and self.spool:
+            self.spool.release(job)
+        job.status = "cancelled"
+        with self._lock:
+            self.outstanding -= 1
+
+    def start(self) -> None:
+        for i in range(self.n_runners):
+            t = threading.Thread(target=self._runner, name=f"worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def join(self) -> None:
+        for t in self._threads:
+            t.join()
+
+# ---------------- spool directory ----------------
+class Spool:
+    """<dir>/incoming/*.json -> processing/<worker>/ (claimed by atomic rename) -> done/ or failed/.
+
+    Several workers may share one spool: whoever renames a file first owns the job, and
+    each worker (<host>-<pid>) claims into its own processing subdirectory.
+    """
+
+    def __init__(self, root: str, worker: Worker, poll: float = 1.0, name: Optional[str] = None):
+        self.root = Path(root)
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.dirs = {d: self.root / d for d in ("incoming", "processing", "done", "failed")}
+        self.claimed = self.dirs["processing"] / self.name
+        for d in (*self.dirs.values(), self.claimed):
+            d.mkdir(parents=True, exist_ok=True)
+        self.worker, self.poll = worker, poll
+        worker.spool = self
+
+    def _stale(self, owner: str) -> bool:
+        """True for this worker's own directory or one left by a dead process on this host."""
+        if owner == self.name:
+            return True
+        host, _, pid = owner.rpartition("-")
+        if host != socket.gethostname() or not pid.isdigit():
+            return False  # another machine's worker: we can't tell whether it is alive
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:  # alive, owned by another user
+            return False
+        return False
+
+    def recover(self) -> int:
+        """Put jobs left in processing/ by crashed workers on this host back into incoming/.
+
+        Running peers keep their claims; only directories whose process is gone are emptied.
+        """
+        n = 0
+        for d in self.dirs["processing"].iterdir():
+            if not d.is_dir() or not self._stale(d.name):
+                continue
+            for p in d.glob("*.json"):
+                os.replace(p, self.dirs["incoming"] / p.name)
+                n += 1
+            if d != self.claimed:
+                try:
+                    d.rmdir()
+                except OSError:
+                    pass
+        return n
+
+    def pending(self) -> int:
+        return sum(1 for _ in self.dirs["incoming"].glob("*.json"))
+
+    def _claim(self, path: Path) -> Optional[Path]:
+        dest = self.claimed / path.name
+        try:
+            os.replace(path, dest)
+        except FileNotFoundError:  # another worker got it
+            return None
+        return dest
+
+    def _incoming(self) -> List[Path]:
+        """incoming/*.json oldest first; files a peer claims while we list them are skipped."""
+        files = []
+        for p in self.dirs["incoming"].glob("*.json"):
+            try:
+                files.append((p.stat().st_mtime, p.name, p))
+            except FileNotFoundError:
+                continue
+        return [p for _, _, p in sorted(files)]
+
+    def poll_once(self) -> int:
+        """Claim as many incoming jobs as the queue has room for; returns how many."""
+        n = 0
+        for path in self._incoming():
+            if not self.worker.has_room() or self.worker.stopping.is_set():
+                break
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+            try:
+                job = Job.from_payload(json.loads(claimed.read_text(encoding="utf-8")), spool_file=claimed)
+            except ValueError as e:  # includes JSONDecodeError
+                self._write(self.dirs["failed"], claimed.stem, {"status": "error", "error": str(e)})
+                claimed.unlink(missing_ok=True)
+                continue
+            if not self.worker.submit(job, timeout=self.poll):
+                self.release(job)
+                break
+            n += 1
+        return n
+
+    def finish(self, job: Job) -> None:
+        dest = self.dirs["done" if job.status == "ok" else "failed"]
+        self._write(dest, job.spool_file.stem, {"job": job.id, **(job.result or {})})
+        job.spool_file.unlink(missing_ok=True)
+
+    def release(self, job: Job) -> None:
+        if job.spool_file and job.spool_file.exists():
+            os.replace(job.spool_file, self.dirs["incoming"] / job.spool_file.name)
+
+    @staticmethod
+    def _write(folder: Path, stem: str, payload: Dict[str, Any]) -> None:
+        tmp = folder / f".{stem}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, folder / f"{stem}.json")
+
+    def loop(self, once: bool = False) -> None:
+        while not self.worker.stopping.is_set():
+            self.poll_once()
+            if once and self.pending() == 0 and self.worker.idle():
+                self.worker.stop()
+                break
+            self.worker.stopping.wait(self.poll)
+
+# ---------------- HTTP endpoint ----------------
+def make_server(host: str, port: int, worker: Worker) -> ThreadingHTTPServer:
+    """POST /jobs -> 202 {id} (503 + Retry-After when full), GET /jobs/<id>, GET /healthz."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self._send(200, {"status": "draining" if worker.stopping.is_set() else "ok",
+                                        "queued": worker.q.qsize(), "running": worker.running})
+            if self.path.startswith("/jobs/"):
+                job = worker.jobs.get(self.path[len("/jobs/"):])
+                return self._send(200, job.public()) if job else self._send(404, {"error": "unknown job"})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._send(404, {"error": "not found"})
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                job = Job.from_payload(json.loads(self.rfile.read(n) or b"null"))
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            if not worker.submit(job):
+                reason = "shutting down" if worker.stopping.is_set() else "queue full"
+                return self._send(503, {"error": reason}, {"Retry-After": "5"})
+            self._send(202, {"id": job.id, "status": job.status})
+
+        def log_message(self, fmt, *args):
+            if worker.verbose:
+                super().log_message(fmt, *args)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run pipeline jobs in a warm, long-running process")
+    parser.add_argument("--spool", help="Spool directory (jobs in <spool>/incoming/*.json)")
+    parser.add_argument("--http", metavar="HOST:PORT", help="Serve POST /jobs on this address")
+    parser.add_argument("--jobs", type=int, default=1, help="Jobs run concurrently")
+    parser.add_argument("--max-pending", type=int, default=8, help="Queued jobs before pushing back")
+    parser.add_argument("--poll", type=float, default=1.0, help="Spool poll interval (seconds)")
+    parser.add_argument("--output-dir", default=None, help="Artifacts directory (default: src/data/output)")
+    parser.add_argument("--pdf-dir", default=None, help="Base directory for job PDF paths (default: src/data)")
+    parser.add_argument("--once", action="store_true", help="Exit when the spool is empty and all jobs are done")
+    parser.add_argument("--no-warm", action="store_true", help="Skip warming crewai/Chroma/embeddings at start")
+    parser.add_argument("--verbose", action="store_true", help="Agent logs and HTTP access log")
+    args = parser.parse_args()
+    if not (args.spool or args.http):
+        parser.error("give --spool and/or --http")
+
+    worker = Worker(jobs=args.jobs, max_pending=args.max_pending, output_dir=args.output_dir,
+                    verbose=args.verbose, pdf_dir=args.pdf_dir)
+    if not args.no_warm:
+        print(f"🔥 Warm-up done in {worker.warm():.1f}s", flush=True)
+
+    server = None
+    if args.http:
+        host, _, port = args.http.rpartition(":")
+        server = make_server(host or "127.0.0.1", int(port), worker)
+        threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+        print(f"🌐 Listening on http://{host or '127.0.0.1'}:{port}/jobs", flush=True)
+
+    def _shutdown(signum, frame):
+        print("🛑 Shutting down: finishing running jobs…", flush=True)
+        worker.stop()
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+
+    worker.start()
+    if args.spool:
+        spool = Spool(args.spool, worker, poll=args.poll)
+        if spool.recover():
+            print("♻️  Re-queued jobs left in processing/ by a previous run", flush=True)
+        spool.loop(once=args.once)
+    else:
+        worker.stopping.wait()
+
+    worker.join()
+    if server:
+        server.shutdown()
+    failed = sum(j.status == "error" for j in worker.jobs.values())
+    print(f"👋 Worker stopped: {len(worker.jobs)} job(s), {failed} failed", flush=True)
+    sys.exit(1 if failed and args.once else 0)
@@ -0,0 +1,61 @@
+# Shared test setup: every store, cache and LLM stays offline and under a temp dir.
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+_TMP = tempfile.mkdtemp(prefix="tests-")
+os.environ.update({
+    "VECTORSTORE_DIR": os.path.join(_TMP, "vectorstore"),
+    "PDF_CACHE_DIR": os.path.join(_TMP, "pdf-text"),
+    "EMBED_CACHE": "0",
+    "RAG_QUERY_CACHE_PATH": "",
+    "LLM_CACHE": "0",
+    "LLM_BACKEND": "synthetic",
+    "LLM_FAKE_LATENCY_MS": "0",
+    "OPENAI_API_KEY": "sk-test-offline",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "CREWAI_TRACING_ENABLED": "false",
+    "OTEL_SDK_DISABLED": "true",
+    "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+})
+
+import pytest
+
+from helpers import HashEmbeddingFunction
+
+@pytest.fixture
+def embed_fn():
+    from src.tools.rag_tools import set_embedding_function
+    ef = HashEmbeddingFunction()
+    set_embedding_function(ef)
+    yield ef
+    set_embedding_function(None)
+
+def page_text(pages):
+    """load_pdf_text-style text: one [p.N] block per page."""
+    return "\n\n".join(f"[p.{i}]\n{txt}" for i, txt in enumerate(pages, start=1))
+
+@pytest.fixture
+def doc(tmp_path, embed_fn):
+    """(pdf, text cache) for a pipeline run: the pipeline reads the text; the PDF is only hashed."""
+    pdf, txt = tmp_path / "paper.pdf", tmp_path / "paper.txt"
+    pdf.write_bytes(b"%PDF-1.4 test stand-in\n")
+    txt.write_text(page_text([
+        "BRCA1 carriers responded to the combined therapy (HR 0.61). Survival improved at 24 months.",
+        "Toxicity was mild. The open-label design may bias reporting of side effects.",
+    ]), encoding="utf-8")
+    return str(pdf), str(txt)
+
+@pytest.fixture
+def agents_cfg():
+    import yaml
+    return yaml.safe_load((ROOT / "src" / "agents.yaml").read_text(encoding="utf-8"))
+
+@pytest.fixture
+def tasks_cfg():
+    import yaml
+    return yaml.safe_load((ROOT / "src" / "tasks.yaml").read_text(encoding="utf-8"))
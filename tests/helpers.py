@@ -0,0 +1,53 @@
+# Test doubles shared by the suite and scripts/bench.py (which puts tests/ on sys.path).
+import hashlib
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+class HashEmbeddingFunction:
+    """Deterministic, network-free bag-of-words embedding (feature hashing, L2-normalised).
+
+    `embedded` counts the texts embedded so far.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim, self.embedded = dim, 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        out = []
+        for text in input:
+            v = np.zeros(self.dim, dtype=np.float32)
+            for w in text.lower().split():
+                v[int(hashlib.md5(w.encode("utf-8")).hexdigest()[:8], 16) % self.dim] += 1.0
+            out.append(v / (np.linalg.norm(v) or 1.0))
+        return out
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path: Path, pages: List[List[str]]) -> Path:
+    """Minimal text-only PDF (Helvetica, one content stream per page, one line per string)."""
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        shown = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {shown} ET"
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objs)} 0 R >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path = Path(path)
+    path.write_bytes(bytes(out))
+    return path
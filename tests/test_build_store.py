@@ -0,0 +1,64 @@
+from conftest import page_text
+
+import pytest
+
+from src.tools.chunking import iter_pages_from_text, iter_token_chunks
+from src.tools.rag_tools import _load_manifest, build_store
+from src.tools.tokens import count_tokens
+
+def _page(topic: str, n: int = 40) -> str:
+    return " ".join(f"The {topic} study measured outcome {i} in cohort {i % 7}." for i in range(n))
+
+PAGES = [_page("BRCA1"), _page("TP53"), _page("EGFR")]
+
+@pytest.mark.parametrize("max_tokens,overlap", [(80, 20), (40, 20), (120, 48)])
+def test_chunks_stay_within_max_tokens(max_tokens, overlap):
+    pages = [_page(g, n) for g, n in (("BRCA1", 12), ("TP53", 3), ("EGFR", 25), ("KRAS", 1))]
+    chunks = list(iter_token_chunks(iter_pages_from_text(page_text(pages)), max_tokens, overlap))
+    assert len(chunks) > 4
+    assert max(count_tokens(text) for text, _ in chunks) <= max_tokens  # [p.N] markers included
+
+def _build(text, tmp_path):
+    return build_store(text, collection_name="doc", persist_dir=str(tmp_path), max_tokens=120, overlap=0)
+
+def test_rebuilding_unchanged_text_embeds_nothing(tmp_path, embed_fn):
+    col = _build(page_text(PAGES), tmp_path)
+    first = embed_fn.embedded
+    assert first == col.count() > 0
+
+    _build(page_text(PAGES), tmp_path)
+    assert embed_fn.embedded == first
+
+def test_only_changed_chunks_are_embedded(tmp_path, embed_fn):
+    col = _build(page_text(PAGES), tmp_path)
+    before = set(_load_manifest(col, "doc", str(tmp_path)))
+    embed_fn.embedded = 0
+
+    changed = PAGES[:1] + [_page("KRAS")] + PAGES[2:]
+    col = _build(page_text(changed), tmp_path)
+    after = set(_load_manifest(col, "doc", str(tmp_path)))
+
+    assert embed_fn.embedded == len(after - before) > 0
+    assert len(after - before) < len(after)  # pages 1 and 3 were reused
+    assert set(col.get()["ids"]) == after    # page 2's old chunks are gone
+
+def test_dropped_pages_are_removed(tmp_path, embed_fn):
+    _build(page_text(PAGES), tmp_path)
+    embed_fn.embedded = 0
+    col = _build(page_text(PAGES[:1]), tmp_path)
+    assert embed_fn.embedded == 0
+    assert col.count() == len(_load_manifest(col, "doc", str(tmp_path)))
+
+def test_concurrent_builds_of_one_collection(tmp_path, embed_fn):
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        cols = list(pool.map(lambda _: _build(page_text(PAGES), tmp_path), range(4)))
+    assert cols[0].count() == len(_load_manifest(cols[0], "doc", str(tmp_path)))
+    assert not list(tmp_path.rglob("*.tmp"))
+
+def test_metadata_only_changes_bump_the_version(tmp_path):
+    from src.tools.rag_tools import _save_manifest
+    ids = {"a": {"chunk": 0, "page_start": 1}, "b": {"chunk": 1, "page_start": 1}}
+    moved = {"a": {"chunk": 1, "page_start": 2}, "b": {"chunk": 0, "page_start": 1}}
+    assert _save_manifest(ids, "doc", str(tmp_path)) != _save_manifest(moved, "doc", str(tmp_path))
+    assert _save_manifest(ids, "doc", str(tmp_path)) == _save_manifest(dict(ids), "doc", str(tmp_path))
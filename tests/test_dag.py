@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.dag import arun_dag, run_dag, task_graph
+
+DEPS = {"notes": [], "figures": [], "post": ["notes", "figures"], "seo": ["post"]}
+
+def _recorder(fail=None, delay=0.02):
+    events, lock = [], threading.Lock()
+    def run(t):
+        with lock:
+            events.append(("start", t))
+        time.sleep(delay)
+        if t == fail:
+            raise RuntimeError(f"{t} failed")
+        with lock:
+            events.append(("end", t))
+        return t.upper()
+    return events, run
+
+def _assert_dependency_order(events):
+    for t, ds in DEPS.items():
+        if ("start", t) in events:
+            for d in ds:
+                assert events.index(("end", d)) < events.index(("start", t))
+
+def test_tasks_start_after_their_dependencies():
+    events, run = _recorder()
+    assert run_dag(DEPS, run, max_workers=4) == {t: t.upper() for t in DEPS}
+    _assert_dependency_order(events)
+    # the two independent roots overlap
+    assert events.index(("start", "figures")) < events.index(("end", "notes"))
+
+def test_failure_propagates_and_dependents_never_start():
+    events, run = _recorder(fail="figures")
+    with pytest.raises(RuntimeError, match="figures failed"):
+        run_dag(DEPS, run, max_workers=4)
+    assert ("start", "post") not in events and ("start", "seo") not in events
+
+def test_done_tasks_are_skipped():
+    events, run = _recorder()
+    assert set(run_dag(DEPS, run, done=["notes", "figures"])) == {"post", "seo"}
+    assert ("start", "notes") not in events
+
+def test_async_dag_order_and_failure():
+    events, run = _recorder()
+    async def arun(t):
+        return await asyncio.to_thread(run, t)
+    assert asyncio.run(arun_dag(DEPS, arun)) == {t: t.upper() for t in DEPS}
+    _assert_dependency_order(events)
+
+    events, run = _recorder(fail="notes")
+    with pytest.raises(RuntimeError, match="notes failed"):
+        asyncio.run(arun_dag(DEPS, arun))
+    assert ("start", "post") not in events
+
+def test_task_graph_rejects_cycles_and_unknown_ids():
+    with pytest.raises(ValueError, match="cycle"):
+        task_graph([{"depends_on": ["b"]}, {"depends_on": ["a"]}], ["a", "b"])
+    with pytest.raises(ValueError, match="unknown"):
+        task_graph([{"depends_on": ["x"]}], ["a"])
+    assert task_graph([{}, {}, {}], ["a", "b", "c"]) == {"a": [], "b": ["a"], "c": ["a", "b"]}
+
+def test_concurrent_tasks_get_their_own_agent(doc, agents_cfg, tmp_path):
+    from src.crew import _Run, _ensure_vectorstore
+
+    pdf, txt = doc
+    tasks = [{"id": "a", "agent": "researcher", "depends_on": []},
+             {"id": "b", "agent": "researcher", "depends_on": []},
+             {"id": "c", "agent": "writer", "depends_on": ["a", "b"]}]
+    ctx = _ensure_vectorstore(pdf, 4, txt_cache=txt)
+    run = _Run(pdf, agents_cfg, tasks, ctx, str(tmp_path / "out"), 4, False, False)
+    run.build()
+    agents = [run.task_agents[t] for t in "abc"]
+    assert len({id(a) for a in agents}) == 3
+    assert len({id(a.llm) for a in agents}) == 3
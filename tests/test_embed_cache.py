@@ -0,0 +1,38 @@
+from helpers import HashEmbeddingFunction
+
+from src.tools.embed_cache import CachedEmbeddingFunction, EmbeddingCache, embedder_id
+
+def _cached(tmp_path, max_rows=100):
+    inner = HashEmbeddingFunction()
+    return inner, CachedEmbeddingFunction(inner, cache=EmbeddingCache(str(tmp_path / "emb.sqlite"), max_rows=max_rows))
+
+def test_repeated_texts_are_embedded_once(tmp_path):
+    inner, ef = _cached(tmp_path)
+    first = ef(["BRCA1 response", "TP53 cohort", "BRCA1 response"])
+    assert inner.embedded == 2  # duplicates within a call share one inner call
+    again = ef(["TP53 cohort", "BRCA1 response"])
+    assert inner.embedded == 2
+    assert (again[1] == first[0]).all()
+    assert ef.cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    inner, ef = _cached(tmp_path, max_rows=3)
+    for text in ("a1", "a2", "a3", "a4", "a5"):
+        ef([text])
+    (rows,) = ef.cache._db.execute("SELECT COUNT(*) FROM emb").fetchone()
+    assert rows == 3
+    inner.embedded = 0
+    ef(["a3", "a4", "a5"])
+    assert inner.embedded == 0
+    ef(["a1"])
+    assert inner.embedded == 1
+
+def test_vectors_are_keyed_by_the_embedder(tmp_path):
+    class Other(HashEmbeddingFunction):
+        pass
+    assert embedder_id(HashEmbeddingFunction()) != embedder_id(Other())
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    CachedEmbeddingFunction(HashEmbeddingFunction(), cache=cache)(["BRCA1"])
+    other = Other()
+    CachedEmbeddingFunction(other, cache=cache)(["BRCA1"])
+    assert other.embedded == 1
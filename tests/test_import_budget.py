@@ -0,0 +1,22 @@
+import importlib.util
+
+import pytest
+
+from conftest import ROOT
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("import_budget", ROOT / "scripts" / "import_budget.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+budget = _load_script()
+
+@pytest.mark.parametrize("name,argv", budget.ENTRY_POINTS, ids=[n for n, _ in budget.ENTRY_POINTS])
+def test_light_entry_points_stay_within_import_budget(name, argv, monkeypatch):
+    monkeypatch.chdir(ROOT)  # `-m src.main` resolves from the repo root
+    baseline, _ = budget.best(["-c", "pass"], 3)
+    total, modules = budget.best(argv, 3)
+    heavy = sorted({m.split(".")[0] for m in modules if m.split(".")[0] in budget.HEAVY})
+    assert not heavy, f"{name} imports {', '.join(heavy)}"
+    assert max(0, total - baseline) / 1000 <= budget.BUDGET_MS
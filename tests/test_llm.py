@@ -0,0 +1,47 @@
+from crewai import LLM
+
+from src.llm import cache as llm_cache
+from src.llm.llms import CachedLLM, build_llm
+
+def test_cache_key_covers_positional_tools(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(LLM, "call", lambda self, messages, *a, **kw: calls.append(a) or f"answer {len(calls)}")
+    llm_cache.configure("on", path=str(tmp_path / "llm.sqlite"))
+    try:
+        llm = CachedLLM(model="gpt-4o-mini")
+        msgs = [{"role": "user", "content": "hi"}]
+        a = llm.call(msgs, [{"name": "search"}])
+        b = llm.call(msgs, [{"name": "lookup"}])
+        assert (a, b) == ("answer 1", "answer 2")
+        assert llm.call(msgs, tools=[{"name": "search"}]) == "answer 1"  # same tools by keyword: a hit
+        assert len(calls) == 2
+    finally:
+        llm_cache.configure("off")
+
+def test_synthetic_backend_never_touches_the_provider(monkeypatch):
+    import litellm
+
+    def provider(*args, **kwargs):
+        raise AssertionError("provider called")
+    monkeypatch.setattr(LLM, "call", provider)
+    monkeypatch.setattr(LLM, "__init__", provider)
+    monkeypatch.setattr(litellm, "completion", provider)
+    llm = build_llm("gpt-4o-mini", {"llm_backend": "synthetic", "temperature": 0.2})
+    assert not isinstance(llm, LLM)
+    out = llm.call([{"role": "user", "content": "Current Task: summarise\nexpected criteria for your final answer: JSON"}])
+    assert out.startswith("Thought: I now know the final answer\nFinal Answer: {")
+
+def test_partial_streams_synthetic_answer(tmp_path):
+    from src.llm.llms import attach_partial
+    from src.utils.partial import PartialWriter
+
+    llm = build_llm("gpt-4o-mini", {"llm_backend": "synthetic"})
+    writer = PartialWriter(tmp_path / "post.md.partial")
+    attach_partial(llm, writer)
+    try:
+        out = llm.call("Current Task: write the post")
+        assert llm.partial is writer
+        assert (tmp_path / "post.md.partial").read_text() == out.split("Final Answer:", 1)[1].lstrip()
+    finally:
+        attach_partial(llm, None)
+    assert llm.partial is None
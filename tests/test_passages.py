@@ -0,0 +1,43 @@
+import os
+
+from conftest import page_text
+
+from src.tools import passages
+from src.tools.passages import search_passages, text_index
+
+def _write(path, pages, stamp=None):
+    path.write_text(page_text(pages), encoding="utf-8")
+    if stamp is not None:
+        os.utime(path, ns=(stamp, stamp))
+
+def test_hits_carry_their_page(tmp_path):
+    txt = tmp_path / "paper.txt"
+    _write(txt, ["Survival improved at 24 months.", "BRCA1 carriers responded.\nToxicity was mild.",
+                 "The open-label design may bias reporting."])
+    hits = search_passages(str(txt), "BRCA1 toxicity", 2)
+    assert [h["page"] for h in hits] == [2]
+    assert "BRCA1" in hits[0]["text"]
+
+def test_top_k_is_ranked_best_first(tmp_path):
+    txt = tmp_path / "paper.txt"
+    _write(txt, ["KRAS was one of many genes tested in the large cohort.", "KRAS KRAS mutations.",
+                 "KRAS mutations were rare.", "Nothing relevant here."])
+    hits = search_passages(str(txt), "KRAS", 2)
+    assert [h["page"] for h in hits] == [2, 3]
+    assert hits[0]["score"] > hits[1]["score"]
+
+def test_index_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    txt = tmp_path / "paper.txt"
+    _write(txt, ["BRCA1 carriers responded."], stamp=1_000_000_000)
+    first = text_index(str(txt))
+    assert text_index(str(txt))[1] is first[1]
+
+    built = []
+    build = passages.BM25Index.build
+    monkeypatch.setattr(passages.BM25Index, "build", lambda *a, **kw: built.append(1) or build(*a, **kw))
+    _write(txt, ["TP53 cohort relapsed."], stamp=1_000_000_000)  # same mtime, new size
+    assert search_passages(str(txt), "TP53", 1)[0]["page"] == 1
+    assert built == [1]
+    _write(txt, ["TP53 cohort relapsed."], stamp=2_000_000_000)  # same size, new mtime
+    text_index(str(txt))
+    assert built == [1, 1]
@@ -0,0 +1,50 @@
+import os
+
+from helpers import write_pdf
+
+from src.tools import pdf_tools
+from src.tools.pdf_tools import cached_pdf_text, iter_pdf_pages, iter_pdf_pages_parallel
+
+def _pdf(tmp_path, n_pages=12, name="paper.pdf"):
+    return str(write_pdf(tmp_path / name, [[f"Page {i} of {name} reports BRCA1 outcome {i}.", f"Cohort {i % 3}."]
+                                           for i in range(1, n_pages + 1)]))
+
+def test_parallel_extraction_matches_serial_in_page_order(tmp_path):
+    pdf = _pdf(tmp_path)
+    parallel = list(iter_pdf_pages_parallel(pdf, workers=3, min_pages=2))
+    assert parallel == list(iter_pdf_pages(pdf))
+    assert [i for i, _ in parallel] == list(range(1, 13))
+    assert "outcome 7" in parallel[6][1]
+
+def _counting(monkeypatch):
+    calls = []
+    load = pdf_tools.load_pdf_text
+    monkeypatch.setattr(pdf_tools, "load_pdf_text", lambda path, **kw: calls.append(path) or load(path, parallel=False))
+    return calls
+
+def test_unchanged_pdf_is_extracted_once(tmp_path, monkeypatch):
+    calls = _counting(monkeypatch)
+    pdf, cache = _pdf(tmp_path), str(tmp_path / "cache")
+    first = cached_pdf_text(pdf, cache_dir=cache)
+    assert cached_pdf_text(pdf, cache_dir=cache) == first
+    assert len(calls) == 1
+    assert "[p.3]" in open(first, encoding="utf-8").read()
+
+def test_new_extractor_version_misses(tmp_path, monkeypatch):
+    calls = _counting(monkeypatch)
+    pdf, cache = _pdf(tmp_path), str(tmp_path / "cache")
+    first = cached_pdf_text(pdf, cache_dir=cache)
+    monkeypatch.setattr(pdf_tools, "EXTRACTOR_VERSION", pdf_tools.EXTRACTOR_VERSION + "-next")
+    assert cached_pdf_text(pdf, cache_dir=cache) != first
+    assert len(calls) == 2
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = tmp_path / "cache"
+    old, recent = (_pdf(tmp_path, 3, f"{n}.pdf") for n in ("old", "recent"))
+    old_entry = cached_pdf_text(old, cache_dir=str(cache))
+    recent_entry = cached_pdf_text(recent, cache_dir=str(cache))
+    os.utime(old_entry, (1_000_000, 1_000_000))
+    size = os.path.getsize(recent_entry)
+
+    newest = cached_pdf_text(_pdf(tmp_path, 3, "new.pdf"), cache_dir=str(cache), max_mb=2.5 * size / 2**20)
+    assert sorted(p.name for p in cache.glob("*.txt")) == sorted(os.path.basename(p) for p in (recent_entry, newest))
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src.crew import run_pipeline, stream_pipeline, trace_file
+from src.main import run_batch
+
+def _run(doc, agents_cfg, tasks_cfg, out, **kwargs):
+    pdf, txt = doc
+    return run_pipeline(pdf, agents_cfg, tasks_cfg, output_dir=str(out), verbose=False, txt_cache=txt, **kwargs)
+
+def _spans(out, pdf):
+    lines = trace_file(str(out), pdf).read_text(encoding="utf-8").splitlines()
+    return {s["name"]: s for s in map(json.loads, lines)}
+
+def test_synthetic_backend_runs_default_tasks(doc, agents_cfg, tasks_cfg, tmp_path):
+    seo = next(t for t in tasks_cfg if t["id"] == "seo-json")
+    seo["compact"] = {"mode": "extractive", "budget": 40}  # below the synthetic notes/post length
+    saved = _run(doc, agents_cfg, tasks_cfg, tmp_path / "out")
+    assert list(saved) == [t["id"] for t in tasks_cfg]
+    assert "tags" in json.loads(Path(saved["seo-json"]).read_text(encoding="utf-8"))
+    assert Path(saved["post"]).read_text(encoding="utf-8").startswith("## ")
+    span = _spans(tmp_path / "out", doc[0])["task:seo-json"]
+    assert 0 < span["context_tokens"] < span["context_tokens_raw"]
+
+def _ran(out, pdf):
+    """Task ids that called the LLM in the last run, in trace order."""
+    spans = trace_file(str(out), pdf).read_text(encoding="utf-8").splitlines()
+    return [s["name"].split(":", 1)[1] for s in map(json.loads, spans)
+            if s["name"].startswith("task:") and s["llm_calls"]]
+
+def test_resume_reruns_only_changed_tasks(doc, agents_cfg, tasks_cfg, tmp_path):
+    out = tmp_path / "out"
+    first = _run(doc, agents_cfg, tasks_cfg, out)
+    assert _ran(out, doc[0]) == ["notes", "post", "seo-json"]
+    notes = Path(first["notes"]).read_text(encoding="utf-8")
+
+    assert _run(doc, agents_cfg, tasks_cfg, out, resume=True) == first
+    assert _ran(out, doc[0]) == []
+
+    post = next(t for t in tasks_cfg if t["id"] == "post")
+    post["description"] += "\nKeep it under 800 words."
+    _run(doc, agents_cfg, tasks_cfg, out, resume=True)
+    assert _ran(out, doc[0]) == ["post", "seo-json"]  # the changed task and what depends on it
+    assert Path(first["notes"]).read_text(encoding="utf-8") == notes
+
+def test_artifacts_land_atomically_as_tasks_finish(doc, agents_cfg, tasks_cfg, tmp_path):
+    pdf, txt = doc
+    out = tmp_path / "out"
+
+    async def collect():
+        seen = []
+        async for ev in stream_pipeline(pdf, agents_cfg, tasks_cfg, output_dir=str(out), txt_cache=txt):
+            if ev.kind == "task":
+                seen.append((ev.task_id, Path(ev.path).read_text(encoding="utf-8")))  # complete on arrival
+            elif ev.kind == "complete":
+                return seen, ev.artifacts
+    seen, artifacts = asyncio.run(collect())
+    assert [tid for tid, _ in seen] == ["notes", "post", "seo-json"]
+    assert all(text == Path(artifacts[tid]).read_text(encoding="utf-8") for tid, text in seen)
+    assert not [p.name for p in out.rglob("*") if p.suffix in (".tmp", ".partial")]
+
+def test_batch_refuses_pdfs_sharing_a_slug(tmp_path):
+    with pytest.raises(ValueError, match="same file name"):
+        run_batch(["a/paper.pdf", "b/Paper.pdf"], {}, [], None, tmp_path)
+    assert not (tmp_path / "data").exists()
+
+def test_resume_reruns_tasks_when_the_resolved_model_changes(doc, agents_cfg, tasks_cfg, tmp_path, monkeypatch):
+    out = tmp_path / "out"
+    _run(doc, agents_cfg, tasks_cfg, out)
+    monkeypatch.setenv("OPENAI_MODEL", "another-model")  # agents.yaml has no model key
+    _run(doc, agents_cfg, tasks_cfg, out, resume=True)
+    assert _ran(out, doc[0]) == ["notes", "post", "seo-json"]
+
+def test_failed_streaming_task_leaves_no_partial(doc, agents_cfg, tasks_cfg, tmp_path, monkeypatch):
+    from src.llm import llms
+    from src.llm.fake import SyntheticLLM
+    answer = SyntheticLLM._cached_call
+
+    def fail_after_streaming(self, messages, *args, **kwargs):
+        out = answer(self, messages, *args, **kwargs)
+        if self.partial is not None:
+            raise RuntimeError("provider dropped the stream")
+        return out
+    monkeypatch.setattr(SyntheticLLM, "_cached_call", fail_after_streaming)
+
+    with pytest.raises(RuntimeError):
+        _run(doc, agents_cfg, tasks_cfg, tmp_path / "out")
+    assert not list((tmp_path / "out").glob("*.partial"))
+    assert not list(llms._partials.values())
+
+def test_concurrent_runs_keep_their_own_context(doc, agents_cfg, tasks_cfg, tmp_path, monkeypatch):
+    from conftest import page_text
+    from src.crew import run_pipeline_async
+    from src.llm import cache as llm_cache
+    from src.tools import rag_tools
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    other_pdf, other_txt = tmp_path / "other.pdf", tmp_path / "other.txt"
+    other_pdf.write_bytes(b"%PDF-1.4 another stand-in\n")
+    other_txt.write_text(page_text(["MYC amplification was rare. Relapse occurred early."]), encoding="utf-8")
+
+    seen = []
+    search = rag_tools._pdf_rag_search_impl
+
+    def spy(query, ctx):
+        cache = llm_cache.get_cache()
+        seen.append((ctx.collection, ctx.top_k, cache.mode if cache else "off"))
+        return search(query, ctx)
+    monkeypatch.setattr(rag_tools, "_pdf_rag_search_impl", spy)
+
+    runs = {"paper": (doc[0], doc[1], 2, "refresh"), "other": (str(other_pdf), str(other_txt), 5, "off")}
+
+    async def both():
+        return await asyncio.gather(*(
+            run_pipeline_async(pdf, agents_cfg, tasks_cfg, output_dir=str(tmp_path / name), txt_cache=txt,
+                               top_k=top_k, llm_cache=mode)
+            for name, (pdf, txt, top_k, mode) in runs.items()))
+    results = dict(zip(runs, asyncio.run(both())))
+
+    assert {c for c, _, _ in seen} == set(runs)
+    assert all((top_k, mode) == runs[c][2:] for c, top_k, mode in seen)
+    for name, saved in results.items():
+        assert all(Path(p).parent == tmp_path / name for p in saved.values())
+        assert _spans(tmp_path / name, runs[name][0])["run_pipeline"]["attrs"]["pdf"] == runs[name][0]
@@ -0,0 +1,111 @@
+import json
+
+from conftest import page_text
+
+from src.tools import rag_tools
+from src.tools.bm25 import BM25Index, rrf_fuse, tokenize
+from src.tools.rag_tools import _pdf_rag_multi_search_impl, _pdf_rag_search_impl, build_store
+from src.tools.run_context import RunContext
+from src.tools.snippets import mmr_order, pack_snippets
+from src.tools.tokens import count_tokens
+
+GENES = ["BRCA1", "TP53", "EGFR", "KRAS"]
+PAGES = [" ".join(f"{g} carriers showed response {i} in the cohort." for i in range(30)) for g in GENES]
+
+def _ctx(tmp_path, top_k=4) -> RunContext:
+    build_store(page_text(PAGES), collection_name="doc", persist_dir=str(tmp_path), max_tokens=80, overlap=0)
+    return RunContext(collection="doc", persist_dir=str(tmp_path), top_k=top_k)
+
+def test_search_embeds_only_the_query(tmp_path, embed_fn, monkeypatch):
+    monkeypatch.setattr(rag_tools, "RAG_OUTPUT", "compact")
+    ctx = _ctx(tmp_path)
+    embed_fn.embedded = 0
+    out = _pdf_rag_search_impl("BRCA1 response", ctx)
+    assert "BRCA1" in out
+    assert embed_fn.embedded == 1  # snippets are packed with their stored vectors
+
+    embed_fn.embedded = 0
+    _pdf_rag_search_impl("BRCA1 response", ctx)  # query-cache hit
+    assert embed_fn.embedded == 0
+
+def test_multi_search_embeds_each_query_once(tmp_path, embed_fn, monkeypatch):
+    monkeypatch.setattr(rag_tools, "RAG_OUTPUT", "compact")
+    ctx = _ctx(tmp_path)
+    embed_fn.embedded = 0
+    _pdf_rag_multi_search_impl(json.dumps(["TP53 cohort", "KRAS carriers"]), ctx)
+    assert embed_fn.embedded == 2
+
+# ---------------- hybrid retrieval ----------------
+def test_rrf_prefers_ids_both_rankings_agree_on():
+    fused = [cid for cid, _ in rrf_fuse([["a", "b", "c"], ["c", "d", "a"]])]
+    assert fused[:2] == ["a", "c"]
+    assert set(fused) == {"a", "b", "c", "d"}
+
+def test_bm25_keeps_gene_codes_whole():
+    index = BM25Index.build([("x", tokenize("IL-6 levels rose")), ("y", tokenize("levels of IL fell 6 fold"))])
+    assert [cid for cid, _ in index.top("IL-6", 2)] == ["x"]
+
+def test_hybrid_search_ranks_exact_term_first(tmp_path, embed_fn, monkeypatch):
+    monkeypatch.setattr(rag_tools, "RAG_MODE", "hybrid")
+    ctx = _ctx(tmp_path)
+    hit = rag_tools._search_many(["KRAS"], 3, ctx.collection, ctx.persist_dir)[0]
+    assert "KRAS" in hit["documents"][0]
+    assert hit["scores"] == sorted(hit["scores"], reverse=True)
+
+def test_mmr_drops_near_duplicates():
+    snippets = [{"text": t, "score": s} for t, s in (("a", 0.9), ("a copy", 0.8), ("b", 0.5))]
+    order = mmr_order(snippets, [[1.0, 0.0], [1.0, 0.001], [0.0, 1.0]])
+    assert order == [0, 2]
+
+def test_pack_snippets_dedups_sentences_within_budget():
+    s1 = "BRCA1 carriers responded. Survival improved at 24 months."
+    s2 = "Survival improved at 24 months. Toxicity was mild."
+    packed = pack_snippets([{"text": s1, "score": 1.0}, {"text": s2, "score": 0.5}],
+                           [[1.0, 0.0], [0.0, 1.0]], budget=30)
+    text = " ".join(p["text"] for p in packed)
+    assert text.count("Survival improved") == 1
+    assert count_tokens(text) <= 30
+
+def test_retrieve_uses_hybrid_ranking(tmp_path, embed_fn, monkeypatch):
+    monkeypatch.setattr(rag_tools, "RAG_MODE", "hybrid")
+    ctx = _ctx(tmp_path)
+    docs = rag_tools.retrieve("KRAS", k=3, collection_name=ctx.collection, persist_dir=ctx.persist_dir)
+    assert docs == rag_tools._search_many(["KRAS"], 3, ctx.collection, ctx.persist_dir)[0]["documents"]
+    assert "KRAS" in docs[0]
+
+def test_rebuild_in_another_process_invalidates_the_query_cache(tmp_path, embed_fn, monkeypatch):
+    import subprocess
+    import sys
+    from conftest import ROOT
+
+    monkeypatch.setattr(rag_tools, "RAG_MODE", "hybrid")
+    ctx = _ctx(tmp_path)
+    _pdf_rag_search_impl("KRAS response", ctx)
+    version = rag_tools.collection_version(ctx.collection, ctx.persist_dir)
+
+    rebuild = (
+        "import sys; sys.path[:0] = [sys.argv[1], sys.argv[1] + '/tests']\n"
+        "from conftest import page_text\n"
+        "from helpers import HashEmbeddingFunction\n"
+        "from src.tools.rag_tools import build_store, set_embedding_function\n"
+        "set_embedding_function(HashEmbeddingFunction())\n"
+        "build_store(page_text(['MYC amplification was rare in the cohort.'] * 3), collection_name='doc',\n"
+        "            persist_dir=sys.argv[2], max_tokens=80, overlap=0)\n"
+    )
+    subprocess.run([sys.executable, "-c", rebuild, str(ROOT), str(tmp_path)], check=True, cwd=ROOT)
+
+    assert rag_tools.collection_version(ctx.collection, ctx.persist_dir) != version
+    misses = rag_tools.query_cache_stats()["misses"]
+    _pdf_rag_search_impl("KRAS response", ctx)
+    assert rag_tools.query_cache_stats()["misses"] == misses + 1
+    index = rag_tools._bm25_index(ctx.collection, ctx.persist_dir)  # the other process's lexical index
+    assert index is not None and "myc" in index.vocab
+
+def test_packing_stats_count_every_concurrent_call(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    monkeypatch.setattr(rag_tools, "RAG_OUTPUT", "compact")
+    monkeypatch.setattr(rag_tools, "_packing", {"calls": 0, "raw_tokens": 0, "tokens": 0})
+    snippets = [{"text": "BRCA1 carriers responded.", "score": 1.0, "page_start": 1, "page_end": 1}]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: rag_tools._render(snippets), range(400)))
+    assert rag_tools.packing_stats()["calls"] == 400
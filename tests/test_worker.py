@@ -0,0 +1,116 @@
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.llm import cache as llm_cache
+from src.worker import Job, Spool, Worker
+
+@pytest.mark.parametrize("key", ["output_dir", "agents", "tasks", "llm_fixture"])
+@pytest.mark.parametrize("value", ["/etc", "../outside", "a/../../b", 7])
+def test_path_overrides_must_stay_relative(key, value):
+    with pytest.raises(ValueError):
+        Job.from_payload({"pdf": "x.pdf", "overrides": {key: value}})
+
+@pytest.mark.parametrize("value", ["/etc/passwd", "../outside.pdf", 7])
+def test_pdf_path_must_stay_relative(value):
+    with pytest.raises(ValueError):
+        Job.from_payload({"pdf": value})
+
+def test_symlinked_pdf_cannot_escape(tmp_path):
+    (tmp_path / "pdfs").mkdir()
+    (tmp_path / "pdfs" / "link").symlink_to(tmp_path)
+    worker = Worker(output_dir=str(tmp_path / "out"), pdf_dir=str(tmp_path / "pdfs"))
+    with pytest.raises(ValueError, match="escapes"):
+        worker.run_job(Job.from_payload({"pdf": "link/x.pdf"}))
+
+def test_recover_leaves_a_running_peers_claims(tmp_path):
+    peer = Spool(str(tmp_path), Worker(), name=f"{socket.gethostname()}-{os.getppid()}")
+    dead = tmp_path / "processing" / f"{socket.gethostname()}-999999999"
+    dead.mkdir()
+    (dead / "lost.json").write_text("{}", encoding="utf-8")
+    (peer.claimed / "busy.json").write_text("{}", encoding="utf-8")
+
+    assert Spool(str(tmp_path), Worker()).recover() == 1
+    assert sorted(p.name for p in (tmp_path / "incoming").iterdir()) == ["lost.json"]
+    assert (peer.claimed / "busy.json").exists()
+    assert not dead.exists()
+
+def test_symlinked_output_dir_cannot_escape(tmp_path):
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "link").symlink_to(tmp_path)
+    worker = Worker(output_dir=str(tmp_path / "out"))
+    job = Job.from_payload({"pdf": "x.pdf", "overrides": {"output_dir": "link"}})
+    with pytest.raises(ValueError, match="escapes"):
+        worker.run_job(job)
+
+def test_llm_cache_mode_is_scoped_per_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    seen = {}
+    started = threading.Barrier(2)
+
+    def run(name, mode):
+        with llm_cache.use_mode(mode):
+            started.wait()
+            cache = llm_cache.get_cache()
+            seen[name] = cache.mode if cache else "off"
+
+    threads = [threading.Thread(target=run, args=a) for a in (("a", "refresh"), ("b", "off"))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == {"a": "refresh", "b": "off"}
+    assert llm_cache.get_cache() is None  # the process-wide setting (LLM_CACHE=0) is untouched
+
+def _spool_root(tmp_path, monkeypatch):
+    """A src/-like root (configs + data/) so run_job reads and writes nothing under the repo."""
+    import shutil
+    from src import worker as worker_mod
+    from conftest import ROOT
+    from helpers import write_pdf
+
+    root = tmp_path / "src"
+    (root / "data").mkdir(parents=True)
+    for name in ("agents.yaml", "tasks.yaml"):
+        shutil.copy(ROOT / "src" / name, root / name)
+    write_pdf(root / "data" / "paper.pdf", [
+        ["BRCA1 carriers responded to the combined therapy (HR 0.61).", "Survival improved at 24 months."],
+        ["Toxicity was mild.", "The open-label design may bias reporting of side effects."],
+    ])
+    monkeypatch.setattr(worker_mod, "ROOT", root)
+    return root
+
+def test_spool_job_runs_end_to_end_offline(tmp_path, monkeypatch, embed_fn):
+    _spool_root(tmp_path, monkeypatch)  # LLM_BACKEND=synthetic (conftest): no provider involved
+    worker = Worker(output_dir=str(tmp_path / "out"))
+    spool = Spool(str(tmp_path / "spool"), worker, poll=0.05)
+    (spool.dirs["incoming"] / "job1.json").write_text(json.dumps({"pdf": "paper.pdf", "id": "j1"}),
+                                                       encoding="utf-8")
+    worker.start()
+    spool.loop(once=True)
+    worker.join()
+
+    result = json.loads((spool.dirs["done"] / "job1.json").read_text(encoding="utf-8"))
+    assert result["job"] == "j1" and result["status"] == "ok"
+    assert all(Path(p).exists() and Path(p).parent == tmp_path / "out" for p in result["artifacts"].values())
+    assert not list(spool.claimed.iterdir())
+
+def test_full_queue_leaves_jobs_in_incoming(tmp_path):
+    worker = Worker(max_pending=1)  # runners not started: nothing drains the queue
+    spool = Spool(str(tmp_path / "spool"), worker, poll=0.01)
+    for i in range(3):
+        (spool.dirs["incoming"] / f"job{i}.json").write_text(json.dumps({"pdf": f"p{i}.pdf"}), encoding="utf-8")
+
+    assert spool.poll_once() == 1
+    assert spool.pending() == 2
+    assert [p.name for p in spool.claimed.iterdir()] == ["job0.json"]
+    assert not worker.submit(Job.from_payload({"pdf": "extra.pdf"}))  # the HTTP path answers 503
+
+    worker.stop()  # the unstarted job goes back to incoming/, as on shutdown
+    worker.start()
+    worker.join()
+    assert spool.pending() == 3